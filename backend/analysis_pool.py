@@ -0,0 +1,115 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from analyzers import registry
+from metrics import ANALYSIS_TIMEOUTS, POOL_RECYCLES
+
+# -------------------- Limits --------------------
+
+def _limit(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def pool_workers() -> int:
+    """
+    Processes per server worker. By default the cores are split between
+    the uvicorn workers (WEB_CONCURRENCY). 0 runs every check in-process.
+    """
+    default = max(1, (os.cpu_count() or 1) // max(1, _limit("WEB_CONCURRENCY", 1)))
+    return _limit("ANALYSIS_WORKERS", _limit("BATCH_WORKERS", default))
+
+
+def timeout_seconds() -> float:
+    return float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "10"))
+
+
+def inline_chars() -> int:
+    # Below this a process round trip costs more than the check itself
+    return _limit("ANALYSIS_INLINE_CHARS", 20000)
+
+
+class AnalysisTimeout(TimeoutError):
+    """Raised when a static check runs longer than ANALYSIS_TIMEOUT_SECONDS."""
+
+
+# -------------------- Process Pool --------------------
+
+_pool = None
+_slots = None
+_slots_loop = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=pool_workers())
+    return _pool
+
+
+def _get_slots() -> asyncio.Semaphore:
+    # One task per process, so the timeout measures running time, not queueing
+    global _slots, _slots_loop
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots_loop is not loop:
+        _slots = asyncio.Semaphore(pool_workers())
+        _slots_loop = loop
+    return _slots
+
+
+def _recycle(pool: ProcessPoolExecutor):
+    """
+    Replaces the pool. A running task cannot be cancelled, so its processes
+    are killed; other tasks that were running on them are retried.
+    """
+    global _pool
+    if _pool is pool:
+        _pool = None
+        POOL_RECYCLES.inc()
+    # The executor has no public way to stop a busy worker
+    for process in list((pool._processes or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _static_pass(language: str, code: str):
+    # Runs in a worker process
+    static_check, _ = registry.load(language)
+    return static_check(code)
+
+
+# -------------------- Static Checks --------------------
+
+async def static_errors(language: str, code: str, inline: bool = None):
+    """
+    Runs the static check for language. Large inputs go to the process pool
+    so they neither hold the GIL nor block the event loop; small ones run
+    here. Raises AnalysisTimeout if the check outlives the timeout.
+    """
+    if inline is None:
+        inline = len(code) < inline_chars()
+    if inline or pool_workers() == 0:
+        return _static_pass(language, code)
+
+    async with _get_slots():
+        for attempt in range(2):
+            pool = get_pool()
+            try:
+                future = asyncio.wrap_future(pool.submit(_static_pass, language, code))
+                return await asyncio.wait_for(future, timeout_seconds())
+            except asyncio.TimeoutError:
+                ANALYSIS_TIMEOUTS.labels(language).inc()
+                _recycle(pool)
+                raise AnalysisTimeout(f"Static analysis took longer than {timeout_seconds():g}s")
+            except BrokenProcessPool:
+                # Another task's timeout took the pool down; try once more
+                _recycle(pool)
+        raise AnalysisTimeout("Static analysis worker crashed")
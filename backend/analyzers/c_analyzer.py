@@ -1,36 +1,58 @@
-import re
-import requests
-import json
+from analyzers import c_family
+from llm import prompt_builder
+from llm.dispatcher import LLMUnavailable, fix_unavailable, generate
+
+ANALYZER_VERSION = 3
+
+# Identifier -> headers that declare it
+HEADERS = {
+    **dict.fromkeys((
+        "printf", "scanf", "fprintf", "sprintf", "snprintf", "puts", "fgets", "fputs",
+        "fopen", "fclose", "fread", "fwrite", "getchar", "putchar", "perror", "FILE",
+    ), ("stdio.h",)),
+    **dict.fromkeys((
+        "malloc", "calloc", "realloc", "free", "exit", "atoi", "atof", "strtol",
+        "rand", "srand", "qsort", "EXIT_SUCCESS", "EXIT_FAILURE",
+    ), ("stdlib.h",)),
+    **dict.fromkeys((
+        "strlen", "strcpy", "strncpy", "strcmp", "strncmp", "strcat", "strchr",
+        "strstr", "memcpy", "memmove", "memset",
+    ), ("string.h",)),
+    **dict.fromkeys(("sqrt", "pow", "fabs", "floor", "ceil", "sin", "cos", "tan"), ("math.h",)),
+    **dict.fromkeys(
+        ("isdigit", "isalpha", "isalnum", "isspace", "isupper", "islower", "toupper", "tolower"),
+        ("ctype.h",),
+    ),
+    **dict.fromkeys(("bool",), ("stdbool.h",)),
+    **dict.fromkeys(
+        ("int8_t", "int16_t", "int32_t", "int64_t", "uint8_t", "uint16_t", "uint32_t", "uint64_t"),
+        ("stdint.h",),
+    ),
+    "assert": ("assert.h",),
+}
 
-def static_c_errors(code: str):
-    errors = []
+# -------------------- Line Scanning --------------------
+# Each line is lexed on its own (facts are its tokens) and the structure
+# checks run over all lines' tokens. This lets the document API
+# (documents.py) re-lex only edited lines.
 
-    if "main(" not in code:
-        errors.append("Line 1: Missing main() function")
+scan_line = c_family.scan_line
 
-    for i, line in enumerate(code.splitlines()):
-        if re.match(r".*[^;{}\s]$", line) and not line.strip().startswith("#"):
-            errors.append(f"Line {i+1}: Missing semicolon")
 
-    if code.count("{") != code.count("}"):
-        errors.append("Opening brace '{' not closed")
+def errors_from_line_facts(facts):
+    """Single pass over facts, so a generator keeps memory flat on huge files."""
+    return c_family.check(facts, "C", HEADERS)
 
-    return errors
 
+def static_errors_from_lines(lines):
+    return errors_from_line_facts(c_family.scan_lines(lines))
 
-def review_with_llm(code: str):
-    errors = static_c_errors(code)
 
-    if not errors:
-        return {
-            "errors": [],
-            "warnings": [],
-            "hint": "No errors found. Your C code is correct.",
-            "solution": "",
-            "additional_tips": ""
-        }
+def static_c_errors(code: str):
+    return static_errors_from_lines(code.splitlines())
+
 
-    prompt = f"""
+PROMPT_TEMPLATE = """
 You are a C systems programmer.
 
 RULES (MANDATORY):
@@ -40,28 +62,14 @@ RULES (MANDATORY):
 - Preserve original logic
 - Only fix errors, do NOT refactor
 
-Return ONLY corrected C code.
+Return ONLY {output}.
 
 Original Code:
 {code}
 """
 
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={"model": "phi", "prompt": prompt, "options": {"temperature": 0}},
-        stream=True
-    )
-
-    fixed_code = ""
-    for line in response.iter_lines():
-        if line:
-            fixed_code += json.loads(line.decode())["response"]
-
-    return {
-        "errors": [{"line": 0, "message": e, "severity": "ERROR", "code": "C001"} for e in errors],
-        "warnings": [],
-        "hint": "Fix the C syntax errors shown above before compilation.",
-        "solution":"""
+# Shown when the model returns nothing usable
+FALLBACK_SOLUTION = """
 #include <fcntl.h>
 #include <unistd.h>
 #include <stdio.h>
@@ -69,10 +77,54 @@ Original Code:
 int main() {
     // corrected template
 }
-""",
+"""
+
+
+def build_prompt(code: str, errors: list):
+    return prompt_builder.build_prompt(PROMPT_TEMPLATE, code, errors, "c")
+
+
+def apply_fix(code: str, errors: list, response: str):
+    return prompt_builder.stitch(PROMPT_TEMPLATE, code, errors, "c", response)
+
+
+def build_result(code: str, errors: list, solution: str = ""):
+    if not errors:
+        return {
+            "errors": [],
+            "warnings": [],
+            "hint": "No errors found. Your C code is correct.",
+            "solution": "",
+            "additional_tips": ""
+        }
+
+    return {
+        "errors": errors,
+        "warnings": [],
+        "hint": "Fix the C syntax errors shown above before compilation.",
+        "solution": solution if solution.strip() else FALLBACK_SOLUTION,
         "additional_tips": (
             "- Every statement must end with a semicolon\n"
             "- All opened braces must be closed\n"
             "- Ensure required headers are included"
         )
     }
+
+
+async def review_with_llm(code: str):
+    errors = static_c_errors(code)
+
+    prompt = build_prompt(code, errors) if errors else None
+
+    if prompt is None:
+        return build_result(code, errors)
+
+    try:
+        fixed_code = await generate(prompt)
+    except LLMUnavailable:
+        return fix_unavailable(build_result(code, errors))
+
+    solution = apply_fix(code, errors, fixed_code)
+    if solution is None:
+        return fix_unavailable(build_result(code, errors))
+    return build_result(code, errors, solution)
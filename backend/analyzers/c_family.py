@@ -0,0 +1,497 @@
+import re
+
+# -------------------- Lexer --------------------
+# Lines are lexed one at a time; the state returned for a line says what
+# is still open at its end (block comment, raw string, backslash-continued
+# string or directive), so documents.py can re-lex only edited lines.
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+    (?P<line_comment>//)
+  | (?P<block_comment>/\*)
+  | (?P<raw_string>(?:u8|[uUL])?R"(?P<delimiter>[^\s()\\]{0,16})\()
+  | (?P<string>(?:u8|[uUL])?"(?:[^"\\]|\\.)*(?:"|(?P<string_open>\\?)$))
+  | (?P<char>(?:u8|[uUL])?'(?:[^'\\]|\\.)*(?:'|(?P<char_open>\\?)$))
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<number>\.?\d(?:[eEpP][-+]|[\w.'])*)
+  | (?P<punct>\.\.\.|->\*?|<=>|<<=|>>=|::|\+\+|--|&&|\|\||<<|>>|[-+*/%&|^!=<>]=|\#\#|\S)
+    )""", re.VERBOSE)
+
+_SIMPLE = {"ident", "punct", "number"}
+
+_DIRECTIVE = re.compile(r"\s*#")
+
+
+def scan_line(line: str, state=None):
+    """
+    Returns (tokens, state). Tokens are (kind, text, column) with 1-based
+    columns; comments are dropped and a preprocessor line becomes a
+    single "directive" token.
+    """
+    tokens = []
+    pos = 0
+
+    if state == "directive":
+        return (), "directive" if line.endswith("\\") else None
+    if state is not None:
+        pos, state = _resume(line, state, tokens)
+        if state is not None:
+            return tuple(tokens), state
+
+    directive = _DIRECTIVE.match(line, pos)
+    if directive and not tokens:
+        # Lex the rest only to track comments that run past the line
+        state = _lex(line, directive.end(), [])
+        if state is None and line.endswith("\\"):
+            state = "directive"
+        return (("directive", line.strip(), directive.end()),), state
+
+    state = _lex(line, pos, tokens)
+    return tuple(tokens), state
+
+
+def _resume(line: str, state, tokens: list):
+    """Finishes a construct left open by the previous line. Returns (position, state)."""
+    if state == "comment":
+        end = line.find("*/")
+        if end < 0:
+            return len(line), state
+        tokens.append(("comment_end", "*/", end + 1))
+        return end + 2, None
+
+    kind, closing = state
+    if kind == "raw":
+        end = line.find(closing)
+        return (len(line), state) if end < 0 else (end + len(closing), None)
+
+    # String continued with a trailing backslash
+    match = re.compile(r'(?:[^%s\\]|\\.)*%s' % (closing, closing)).match(line)
+    if match:
+        return match.end(), None
+    return len(line), state if line.endswith("\\") else None
+
+
+def _lex(line: str, pos: int, tokens: list):
+    """Appends the tokens of line[pos:] and returns the state at its end."""
+    while True:
+        for match in _TOKEN.finditer(line, pos):
+            kind = match.lastgroup
+            if kind in _SIMPLE:
+                tokens.append((kind, match.group(kind), match.start(kind) + 1))
+                continue
+            column = match.start(kind) + 1
+
+            if kind == "line_comment":
+                return None
+            if kind == "block_comment":
+                end = line.find("*/", match.end())
+                if end < 0:
+                    tokens.append(("comment_start", "/*", column))
+                    return "comment"
+                pos = end + 2
+                break
+            if kind == "raw_string":
+                closing = ")" + match.group("delimiter") + '"'
+                end = line.find(closing, match.end())
+                if end < 0:
+                    tokens.append(("string", match.group(kind), column))
+                    return ("raw", closing)
+                tokens.append(("string", line[column - 1:end + len(closing)], column))
+                pos = end + len(closing)
+                break
+
+            text = match.group(kind)
+            if kind in ("string", "char"):
+                still_open = match.group(kind + "_open")
+                if still_open == "\\":
+                    tokens.append((kind, text, column))
+                    return ("string", '"' if kind == "string" else "'")
+                if still_open is not None:
+                    kind = "unterminated"
+            tokens.append((kind, text, column))
+        else:
+            return None
+
+
+def scan_lines(lines):
+    """Yields the tokens of each line, carrying lexer state along."""
+    state = None
+    for line in lines:
+        tokens, state = scan_line(line, state)
+        yield tokens
+
+
+# -------------------- Structure Checks --------------------
+
+KEYWORDS = {
+    "auto", "break", "case", "char", "const", "continue", "default", "do", "double", "else",
+    "enum", "extern", "float", "for", "goto", "if", "inline", "int", "long", "register",
+    "restrict", "return", "short", "signed", "sizeof", "static", "struct", "switch",
+    "typedef", "union", "unsigned", "void", "volatile", "while", "_Bool", "bool",
+    "alignas", "alignof", "catch", "class", "constexpr", "const_cast", "decltype",
+    "delete", "dynamic_cast", "explicit", "export", "friend", "mutable", "namespace",
+    "new", "noexcept", "operator", "override", "final", "private", "protected", "public",
+    "reinterpret_cast", "static_assert", "static_cast", "template", "throw", "try",
+    "typeid", "typename", "using", "virtual", "co_await", "co_return", "co_yield",
+}
+
+# Keywords that can end an expression
+VALUE_KEYWORDS = {"this", "true", "false", "nullptr"}
+
+CONTROL = {"if", "while", "for", "switch"}          # a (header) then a body
+BODY_KEYWORDS = {"else", "do", "try"}               # a body directly
+TYPE_KEYWORDS = {"struct", "class", "union", "enum"}
+LABEL_KEYWORDS = {"case", "default", "public", "private", "protected"}
+CONTINUES_STATEMENT = {")", "]", "++", "--"}
+
+# A name right after one of these is being declared, not used
+DECLARATION_KEYWORDS = {
+    "void", "char", "short", "int", "long", "float", "double", "signed", "unsigned",
+    "bool", "_Bool", "auto", "static", "extern", "inline", "const", "struct",
+}
+
+# Frames whose contents are statements
+STATEMENT_FRAMES = {"block", "expression_block", "type"}
+
+OPENERS = {"(": ")", "[": "]", "{": "}"}
+CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+INCLUDE = re.compile(r'#\s*include\s*([<"])\s*([^>"]+?)\s*[>"]')
+
+# Including this provides every standard header
+EVERYTHING = "bits/stdc++.h"
+
+
+def diagnostic(line: int, column: int, message: str, code: str):
+    return {"line": line, "column": column, "message": message, "severity": "ERROR", "code": code}
+
+
+class Frame:
+    """An open delimiter. Braces remember the statement they interrupted."""
+
+    __slots__ = ("char", "line", "column", "kind", "saved")
+
+    def __init__(self, char, line, column, kind, saved=None):
+        self.char = char
+        self.line = line
+        self.column = column
+        self.kind = kind        # paren, header, bracket, block, expression_block, init, type, enum
+        self.saved = saved
+
+
+class StructureChecker:
+    """
+    One linear pass over the token stream. Reports:
+      - delimiters that are unmatched, mismatched or never closed,
+        at the opening location
+      - missing semicolons, only where a statement ends: the line ends
+        in something that can end an expression and the next line
+        starts a new statement
+      - identifiers used without the standard header that declares them
+      - a missing main(), unterminated literals and comments
+
+    Codes are prefixed per language (C001 / CPP001 ...).
+    """
+
+    def __init__(self, prefix: str, headers: dict, lambdas: bool = False):
+        self.prefix = prefix
+        self.headers = headers          # identifier -> headers that declare it
+        self.lambdas = lambdas          # C++: "){" inside an expression opens a lambda body
+        self.errors = []
+        self.stack = []
+        self.includes = set()
+        self.local_include = False
+        self.used = {}                  # identifier -> (line, column) of first use
+        self.declared = set()
+        self.candidate = None           # header-provided name, waiting to see how it is used
+        self.has_main = False
+        self.open_comment = None
+        self.pending = None             # (line, column, last kind, declaration-like) awaiting the next token
+        self.deferred = None
+        self.prev = ("", "")
+        self._reset_statement()
+
+    # ---- statements ----
+
+    def _reset_statement(self):
+        self.stmt_tokens = 0
+        self.stmt_first = ""
+        self.stmt_header = False        # saw if/while/for/switch, waiting for its (
+        self.stmt_paren = False
+        self.stmt_assign = False
+        self.stmt_colon = False
+        self.stmt_type = ""
+        self.stmt_decl = True           # only identifiers, *, &, ::, < and > so far
+
+    def _save_statement(self):
+        return (self.stmt_tokens, self.stmt_first, self.stmt_header, self.stmt_paren,
+                self.stmt_assign, self.stmt_colon, self.stmt_type, self.stmt_decl)
+
+    def _restore_statement(self, saved):
+        (self.stmt_tokens, self.stmt_first, self.stmt_header, self.stmt_paren,
+         self.stmt_assign, self.stmt_colon, self.stmt_type, self.stmt_decl) = saved
+
+    def _at_statement_level(self):
+        return not self.stack or self.stack[-1].kind in STATEMENT_FRAMES
+
+    def _error(self, line, column, message, number):
+        self.errors.append(diagnostic(line, column, message, f"{self.prefix}{number:03d}"))
+
+    def _missing_semicolon(self, line, column):
+        self._error(line, column, "Missing semicolon", 1)
+        self._reset_statement()
+
+    # ---- tokens ----
+
+    def feed(self, lineno: int, tokens):
+        ends = False
+        stack = self.stack
+        for kind, text, column in tokens:
+            if kind == "directive":
+                self._directive(text)
+                continue
+            if kind == "comment_start":
+                self.open_comment = (lineno, column)
+                continue
+            if kind == "comment_end":
+                self.open_comment = None
+                continue
+            if self.candidate is not None:
+                self._resolve_candidate(kind, text)
+            if self.deferred is not None:
+                self._resolve_deferred(text)
+            if self.pending is not None:
+                self._resolve_pending(kind, text)
+
+            if kind == "unterminated":
+                literal = "character" if text.lstrip("u8UL").startswith("'") else "string"
+                self._error(lineno, column, f"Unterminated {literal} literal", 5)
+                # The literal swallowed the rest of the line; treat it as ended
+                self._reset_statement()
+                ends = False
+                self.prev = ("string", text)
+                continue
+
+            statement_level = not stack or stack[-1].kind in STATEMENT_FRAMES
+            counts = True
+
+            if kind == "punct":
+                if text in OPENERS:
+                    counts = self._open(text, lineno, column, statement_level)
+                    ends = False
+                elif text in CLOSERS:
+                    ends = self._close(text, lineno, column)
+                    counts = False
+                elif statement_level and text == ";":
+                    self._reset_statement()
+                    ends = counts = False
+                elif statement_level and text == ":" and (
+                    self.stmt_first in LABEL_KEYWORDS or (self.stmt_tokens == 1 and self.prev[0] == "ident")
+                ):
+                    self._reset_statement()  # case / access specifier / goto label
+                    ends = counts = False
+                else:
+                    ends = text in CONTINUES_STATEMENT
+                    if text == "=":
+                        self.stmt_assign = True
+                    elif text == ":":
+                        self.stmt_colon = True
+                    if text not in ("*", "&", "::", "<", ">"):
+                        self.stmt_decl = False
+            elif kind == "ident":
+                if statement_level and not self.stmt_tokens and text in BODY_KEYWORDS:
+                    self._reset_statement()
+                    ends = counts = False
+                else:
+                    ends = self._identifier(text, lineno, column, statement_level)
+            else:
+                ends = True
+                self.stmt_decl = False
+
+            if statement_level and counts:
+                if not self.stmt_tokens:
+                    self.stmt_first = text
+                self.stmt_tokens += 1
+            self.prev = (kind, text)
+
+        if ends and self._at_statement_level() and self.stmt_tokens and not self.stmt_header:
+            last_kind, last_text, last_column = tokens[-1]
+            if not self._looks_like_macro():
+                self.pending = (lineno, last_column + len(last_text), last_kind, self.stmt_decl)
+
+    def _looks_like_macro(self):
+        # FOO(x) / Q_OBJECT style invocations and [[attributes]] legitimately stand alone
+        first = self.stmt_first
+        return first == "[" or (len(first) > 1 and first.isupper() and not self.stmt_assign)
+
+    def _identifier(self, text, lineno, column, statement_level):
+        if statement_level and self.stmt_tokens == 0 and text in CONTROL:
+            self.stmt_header = True
+        if text in TYPE_KEYWORDS and statement_level and not self.stmt_type:
+            self.stmt_type = text
+        if text == "return":
+            self.stmt_decl = False
+
+        if text == "main" and not self.stack:
+            self.has_main = True
+        if text in self.headers and self.prev[1] not in (".", "->"):
+            if self.prev[1] in DECLARATION_KEYWORDS or (self.prev[1] == "*" and self.stmt_decl):
+                self.declared.add(text)  # e.g. "int read(...)" defines its own
+            elif self.prev[1] in ("::", "<<", ">>"):
+                self.used.setdefault(text, (lineno, column))
+            else:
+                self.candidate = (text, lineno, column)
+
+        return text not in KEYWORDS or text in VALUE_KEYWORDS
+
+    def _resolve_candidate(self, kind, text):
+        # Calls, templates and types: printf(...), vector<int>, FILE *f, bool ok.
+        # A variable that happens to be called "queue" or "set" is left alone.
+        name, line, column = self.candidate
+        self.candidate = None
+        if kind == "ident" or text in ("(", "<", "*", "&", "<<", ">>"):
+            self.used.setdefault(name, (line, column))
+
+    def _directive(self, text: str):
+        include = INCLUDE.match(text)
+        if include:
+            if include.group(1) == '"':
+                self.local_include = True
+            self.includes.add(include.group(2))
+
+    # ---- delimiters ----
+
+    def _open(self, char, lineno, column, statement_level):
+        """Pushes a frame. Returns False for braces that start a new statement context."""
+        if char == "(":
+            kind = "header" if statement_level and self.stmt_header and self.stmt_tokens == 1 else "paren"
+            if statement_level:
+                self.stmt_paren = True
+                self.stmt_decl = False
+            self.stack.append(Frame(char, lineno, column, kind))
+        elif char == "[":
+            self.stmt_decl = False
+            self.stack.append(Frame(char, lineno, column, "bracket"))
+        else:
+            kind = self._brace_kind(statement_level)
+            if kind not in ("block", "expression_block", "type"):
+                self.stack.append(Frame(char, lineno, column, kind))
+                return True
+            self.stack.append(Frame(char, lineno, column, kind, self._save_statement()))
+            self._reset_statement()
+            return False
+        return True
+
+    def _brace_kind(self, statement_level):
+        prev_kind, prev = self.prev
+        expression_block = "expression_block" if self.lambdas else "init"
+        if not statement_level:
+            if self.stack[-1].kind in ("init", "enum") or prev not in (")", "]"):
+                return "init"
+            return expression_block        # lambda body inside a call
+        if not self.stmt_tokens and prev in ("{", ";", "}", ":"):
+            return "block"                 # bare compound statement
+        if prev in ("=", ",", "(", "[", "{", "return", "?"):
+            return "init"
+        if self.stmt_type and not self.stmt_paren:
+            return "enum" if self.stmt_type == "enum" else "type"
+        if self.stmt_assign or self.stmt_first == "return":
+            return expression_block        # lambda or compound literal
+        if (prev_kind == "ident" and prev not in KEYWORDS and self.stmt_tokens
+                and (not self.stmt_paren or self.stmt_colon)
+                and self.stmt_first not in ("namespace", "extern")):
+            return "init"                  # Point p{1, 2} / constructor x{1}
+        return "block"
+
+    def _close(self, char, lineno, column):
+        opener = CLOSERS[char]
+        if not any(frame.char == opener for frame in self.stack):
+            self._error(lineno, column, f"Unmatched '{char}'", 2)
+            return False
+
+        # Anything opened after the matching opener was never closed
+        recovered = self.stack[-1].char != opener
+        while self.stack[-1].char != opener:
+            frame = self.stack.pop()
+            self._error(
+                frame.line, frame.column,
+                f"'{frame.char}' opened here is not closed before '{char}' on line {lineno}", 2,
+            )
+            if frame.saved is not None:
+                self._restore_statement(frame.saved)
+
+        frame = self.stack.pop()
+        if frame.kind == "header":
+            self._reset_statement()        # the body starts here
+            return False
+        if frame.kind in ("block", "expression_block", "type"):
+            if self.stmt_tokens and not self.stmt_header and not recovered:
+                # e.g. "{ return x }"
+                self._missing_semicolon(lineno, column)
+            self._restore_statement(frame.saved)
+            if frame.kind == "block":
+                self._reset_statement()
+                return False
+        return True
+
+    # ---- missing semicolons ----
+
+    def _resolve_pending(self, kind, text):
+        line, column, last_kind, declaration = self.pending
+        self.pending = None
+        starts_statement = kind in ("ident", "number", "char", "unterminated") or text == "}" or (
+            kind == "string" and last_kind != "string"  # adjacent literals concatenate
+        )
+        if not starts_statement:
+            return
+        if kind == "ident" and declaration:
+            # "static size_t\nfoo(void)" splits a declaration; decide on the next token
+            self.deferred = (line, column, text)
+            return
+        self._missing_semicolon(line, column)
+
+    def _resolve_deferred(self, text):
+        line, column, name = self.deferred
+        self.deferred = None
+        if text not in ("(", "::", ",", ";", "=", "[", "{"):
+            self._missing_semicolon(line, column)
+            # The name that followed starts the next statement
+            self.stmt_tokens, self.stmt_first = 1, name
+
+    # ---- results ----
+
+    def finish(self):
+        if self.deferred is not None:
+            self._resolve_deferred("")
+        if self.pending is not None:
+            self._resolve_pending("ident", "")
+            if self.deferred is not None:
+                self._resolve_deferred("")
+
+        for frame in reversed(self.stack):
+            self._error(frame.line, frame.column, f"'{frame.char}' opened here is never closed", 2)
+        if self.open_comment:
+            self._error(*self.open_comment, "Comment opened here is never closed", 5)
+        if not self.has_main:
+            self._error(1, 1, "Missing main() function", 3)
+
+        # A project header may include anything, so only check files without one
+        if not self.local_include and EVERYTHING not in self.includes:
+            reported = set()
+            for name, (line, column) in self.used.items():
+                needed = self.headers[name]
+                if name in self.declared or self.includes & set(needed) or needed[0] in reported:
+                    continue
+                reported.add(needed[0])
+                self._error(line, column, f"'{name}' is used without #include <{needed[0]}>", 4)
+
+        return sorted(self.errors, key=lambda d: (d["line"], d["column"]))
+
+
+def check(token_lines, prefix: str, headers: dict, lambdas: bool = False):
+    """Runs the structure checks over an iterable of per-line tokens."""
+    checker = StructureChecker(prefix, headers, lambdas)
+    for lineno, tokens in enumerate(token_lines, 1):
+        if tokens:
+            checker.feed(lineno, tokens)
+    return checker.finish()
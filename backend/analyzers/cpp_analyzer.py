@@ -1,48 +1,102 @@
-import requests
-import json
+from analyzers import c_analyzer, c_family
+from llm import prompt_builder
+from llm.dispatcher import LLMUnavailable, fix_unavailable, generate
 
-def review_with_llm(code: str):
-    errors = []
-    if "using namespace std" in code and "#include<iostream>" not in code:
-        errors.append("Missing <iostream> include")
+ANALYZER_VERSION = 3
 
-    if "main(" not in code:
-        errors.append("Missing main() function")
+# Identifier -> headers that declare it; the C names also come from <cX>
+HEADERS = {
+    **{name: ("c" + headers[0][:-2], *headers) for name, headers in c_analyzer.HEADERS.items() if name != "bool"},
+    **dict.fromkeys(("cout", "cin", "cerr", "clog", "endl"), ("iostream",)),
+    **dict.fromkeys(("ifstream", "ofstream", "fstream"), ("fstream",)),
+    **dict.fromkeys(("stringstream", "istringstream", "ostringstream"), ("sstream",)),
+    "vector": ("vector",),
+    "map": ("map",),
+    "unordered_map": ("unordered_map",),
+    "set": ("set",),
+    "unordered_set": ("unordered_set",),
+    "queue": ("queue",),
+    "priority_queue": ("queue",),
+    "stack": ("stack",),
+    "deque": ("deque",),
+    "pair": ("utility", "map", "unordered_map"),
+    "sort": ("algorithm",),
+    "unique_ptr": ("memory",),
+    "shared_ptr": ("memory",),
+    "make_unique": ("memory",),
+    "make_shared": ("memory",),
+}
 
-    if not errors:
-        return {
-            "errors": [],
-            "warnings": [],
-            "hint": "No errors found. Your C++ code is correct.",
-            "solution": "",
-            "additional_tips": ""
-        }
+# -------------------- Line Scanning --------------------
+# Same lexer and structure checks as C (see c_analyzer), with C++ headers.
+
+scan_line = c_family.scan_line
 
-    prompt = f"""
-Fix ALL C++ errors and return a corrected program.
+
+def errors_from_line_facts(facts):
+    return c_family.check(facts, "CPP", HEADERS, lambdas=True)
+
+
+def static_errors_from_lines(lines):
+    return errors_from_line_facts(c_family.scan_lines(lines))
+
+
+def static_cpp_errors(code: str):
+    return static_errors_from_lines(code.splitlines())
+
+
+PROMPT_TEMPLATE = """
+Fix ALL C++ errors and return {output}.
 
 Errors:
-{chr(10).join(errors)}
+{errors}
 
 Code:
 {code}
 """
 
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={"model": "phi", "prompt": prompt, "options": {"temperature": 0}},
-        stream=True
-    )
 
-    fixed_code = ""
-    for line in response.iter_lines():
-        if line:
-            fixed_code += json.loads(line.decode())["response"]
+def build_prompt(code: str, errors: list):
+    return prompt_builder.build_prompt(PROMPT_TEMPLATE, code, errors, "cpp")
+
+
+def apply_fix(code: str, errors: list, response: str):
+    return prompt_builder.stitch(PROMPT_TEMPLATE, code, errors, "cpp", response)
+
+
+def build_result(code: str, errors: list, solution: str = ""):
+    if not errors:
+        return {
+            "errors": [],
+            "warnings": [],
+            "hint": "No errors found. Your C++ code is correct.",
+            "solution": "",
+            "additional_tips": ""
+        }
 
     return {
-        "errors": [{"line": 0, "message": e, "severity": "ERROR", "code": "CPP001"} for e in errors],
+        "errors": errors,
         "warnings": [],
         "hint": "Fix the C++ syntax issues shown above.",
-        "solution": fixed_code,
+        "solution": solution,
         "additional_tips": "- Include correct headers\n- Use std namespace properly"
     }
+
+
+async def review_with_llm(code: str):
+    errors = static_cpp_errors(code)
+
+    prompt = build_prompt(code, errors) if errors else None
+
+    if prompt is None:
+        return build_result(code, errors)
+
+    try:
+        fixed_code = await generate(prompt)
+    except LLMUnavailable:
+        return fix_unavailable(build_result(code, errors))
+
+    solution = apply_fix(code, errors, fixed_code)
+    if solution is None:
+        return fix_unavailable(build_result(code, errors))
+    return build_result(code, errors, solution)
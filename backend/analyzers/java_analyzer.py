@@ -1,25 +1,53 @@
-def review_with_llm(code: str):
-    errors = []
+from analyzers.rules import Rule, RuleSet
 
-    if "class " not in code:
-        errors.append("Missing class declaration")
+ANALYZER_VERSION = 2
 
-    if "public static void main" not in code:
-        errors.append("Missing main method")
+# -------------------- Rules --------------------
+
+RULES = RuleSet("java", [
+    Rule("java-class", "JAVA001", "Missing class declaration", tokens="class", missing=True),
+    Rule("java-main", "JAVA001", "Missing main method", substring="public static void main", missing=True),
+    Rule(
+        "java-class-name", "JAVA002", "Class names should start with an uppercase letter",
+        severity="WARNING", tokens="class /[a-z_$][\\w$]*/",
+    ),
+    Rule(
+        "java-string-compare", "JAVA003", "Compare strings with equals(), not ==",
+        severity="WARNING", tokens='== /".*/',
+    ),
+])
+
+
+def static_java_errors(code: str):
+    return RULES.check(code)
+
+
+def build_prompt(code: str, errors: list):
+    # Java fixes are rule-based; no LLM round trip needed
+    return None
+
+
+def build_result(code: str, errors: list, solution: str = ""):
+    warnings = [d for d in errors if d["severity"] != "ERROR"]
+    errors = [d for d in errors if d["severity"] == "ERROR"]
 
     if not errors:
         return {
             "errors": [],
-            "warnings": [],
+            "warnings": warnings,
             "hint": "No errors found. Your Java code is correct.",
             "solution": "",
             "additional_tips": ""
         }
 
     return {
-        "errors": [{"line": 0, "message": e, "severity": "ERROR", "code": "JAVA001"} for e in errors],
-        "warnings": [],
+        "errors": errors,
+        "warnings": warnings,
         "hint": "Fix Java class and main method errors.",
-        "solution": code.replace("class", "public class"),
+        "solution": solution or code.replace("class", "public class"),
         "additional_tips": "- Java requires a main method\n- Class name must match file name"
     }
+
+
+async def review_with_llm(code: str):
+    return build_result(code, static_java_errors(code))
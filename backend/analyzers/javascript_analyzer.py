@@ -1,22 +1,47 @@
-def review_with_llm(code: str):
-    errors = []
+from analyzers.rules import Rule, RuleSet
 
-    if "console.log(" in code and ";" not in code:
-        errors.append("Missing semicolon")
+ANALYZER_VERSION = 2
+
+# -------------------- Rules --------------------
+
+RULES = RuleSet("javascript", [
+    Rule("js-semicolon", "JS001", "Missing semicolon", substring="console.log(", once=True, unless=";"),
+    Rule("js-var", "JS002", "Prefer let or const over var", severity="WARNING", tokens="var"),
+    Rule("js-loose-equality", "JS003", "Use === instead of ==", severity="WARNING", tokens="=="),
+    Rule("js-loose-inequality", "JS003", "Use !== instead of !=", severity="WARNING", tokens="!="),
+])
+
+
+def static_javascript_errors(code: str):
+    return RULES.check(code)
+
+
+def build_prompt(code: str, errors: list):
+    # JavaScript fixes are rule-based; no LLM round trip needed
+    return None
+
+
+def build_result(code: str, errors: list, solution: str = ""):
+    warnings = [d for d in errors if d["severity"] != "ERROR"]
+    errors = [d for d in errors if d["severity"] == "ERROR"]
 
     if not errors:
         return {
             "errors": [],
-            "warnings": [],
+            "warnings": warnings,
             "hint": "No errors found. Your JavaScript code is correct.",
             "solution": "",
             "additional_tips": ""
         }
 
     return {
-        "errors": [{"line": 0, "message": e, "severity": "ERROR", "code": "JS001"} for e in errors],
-        "warnings": [],
+        "errors": errors,
+        "warnings": warnings,
         "hint": "Fix JavaScript syntax errors.",
-        "solution": code + ";",
+        "solution": solution or code + ";",
         "additional_tips": "- Use semicolons\n- Prefer const and let"
     }
+
+
+async def review_with_llm(code: str):
+    return build_result(code, static_javascript_errors(code))
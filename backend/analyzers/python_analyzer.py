@@ -1,81 +1,600 @@
 import ast
+import builtins
+import gc
 import re
-import requests
-import json
+import tokenize
+import warnings
+from contextlib import contextmanager
+from analyzers.rules import Rule, RuleSet
+from llm import prompt_builder
+from llm.dispatcher import LLMUnavailable, fix_unavailable, generate
 from llm.llm_explainer import parse_llm_sections
 
-PYTHON_BUILTINS = {"print", "range", "len", "int", "str", "list", "dict"}
+ANALYZER_VERSION = 5
 
-def static_python_errors(code: str):
-    errors = []
-    lines = code.splitlines()
-    defined_vars = set()
+BUILTIN_NAMES = {name for name in dir(builtins) if not name.startswith("__")}
+
+# Names Python provides implicitly in module, class and method bodies
+IMPLICIT_NAMES = {
+    "__name__", "__file__", "__doc__", "__spec__", "__loader__", "__package__",
+    "__builtins__", "__path__", "__module__", "__qualname__", "__class__",
+    "__debug__", "__annotations__", "__dict__",
+}
+
+# Stop recovering after this many syntax errors
+MAX_SYNTAX_ERRORS = 10
+
+C_STYLE_FOR = re.compile(r"\bfor\s*\(\s*int\b")
+IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+
+# -------------------- Diagnostics --------------------
+
+def diagnostic(line: int, column: int, message: str, severity: str, code: str):
+    return {"line": line, "column": column, "message": message, "severity": severity, "code": code}
+
+
+# -------------------- Syntax Error Recovery --------------------
 
+def _logical_line_span(lines: list, lineno: int):
+    """
+    Returns the (first, last) physical lines of the logical line containing
+    lineno, so a multi-line statement is removed as a whole.
+    """
+    start = 1
+    depth = 0
+    readline = iter(line + "\n" for line in lines).__next__
     try:
-        ast.parse(code)
-    except SyntaxError as e:
-        errors.append(
-            f"Line {e.lineno}: {e.text.rstrip()}\n"
-            f"       ^^^ Error: {e.msg}"
-        )
+        for token in tokenize.generate_tokens(readline):
+            if token.type == tokenize.OP and token.string in "([{":
+                depth += 1
+            elif token.type == tokenize.OP and token.string in ")]}":
+                depth = max(depth - 1, 0)
+            elif token.type == tokenize.NEWLINE or (token.type == tokenize.NL and depth == 0):
+                if token.end[0] >= lineno:
+                    return min(start, lineno), token.end[0]
+                start = token.end[0] + 1
+    except (tokenize.TokenError, SyntaxError, StopIteration):
+        pass
 
-    for line in lines:
-        m = re.match(r"\s*(\w+)\s*=", line)
-        if m:
-            defined_vars.add(m.group(1))
+    # Tokenizing failed (e.g. an unclosed bracket): take the more-indented
+    # lines that follow as the statement's continuation.
+    first = min(start, lineno)
+    indent = len(lines[first - 1]) - len(lines[first - 1].lstrip())
+    last = lineno
+    while last < len(lines) and lines[last].strip() and len(lines[last]) - len(lines[last].lstrip()) > indent:
+        last += 1
+    return first, last
 
-    for i, line in enumerate(lines):
-        if re.search(r"\bfor\s*\(\s*int\b", line):
-            errors.append(f"Line {i+1}: C-style for loop not allowed")
 
-        if re.search(r"print\((\w+)\)", line):
-            var = re.search(r"print\((\w+)\)", line).group(1)
-            if var not in defined_vars and var not in PYTHON_BUILTINS:
-                errors.append(f"Line {i+1}: name '{var}' is not defined")
+def parse_with_recovery(code: str):
+    """
+    Parses code, replacing each statement that fails to parse with a
+    placeholder and retrying, so errors after the first are still found.
 
-    return list(dict.fromkeys(errors))
+    Returns (tree or None, syntax diagnostics, names seen in removed lines).
+    """
+    lines = None     # split on the first error; clean code is parsed as is
+    source = code
+    diagnostics = []
+    removed_names = set()
+    seen = set()
 
+    for _ in range(MAX_SYNTAX_ERRORS):
+        try:
+            with warnings.catch_warnings():
+                # e.g. "invalid escape sequence" would otherwise go to stderr
+                warnings.simplefilter("ignore", SyntaxWarning)
+                return ast.parse(source), diagnostics, removed_names
+        except SyntaxError as e:
+            if lines is None:
+                lines = code.splitlines()
+            lineno = e.lineno or 1
+            text = lines[lineno - 1] if 0 < lineno <= len(lines) else (e.text or "")
+            if C_STYLE_FOR.search(text):
+                message, code_id = "C-style for loop not allowed", "PY003"
+            else:
+                message, code_id = e.msg, "PY001"
+            diagnostics.append(diagnostic(lineno, e.offset or 1, message, "ERROR", code_id))
 
-def review_with_llm(code: str):
-    errors = static_python_errors(code)
+            # Errors at EOF (unclosed brackets) and indentation errors
+            # cannot be isolated to one statement.
+            if isinstance(e, IndentationError) or lineno in seen or not 0 < lineno <= len(lines):
+                return None, diagnostics, removed_names
+            seen.add(lineno)
 
-    if not errors:
-        return {
-            "errors": [],
-            "warnings": [],
-            "hint": "No errors found. Your code is correct.",
-            "solution": "",
-            "additional_tips": ""
-        }
+            first, last = _logical_line_span(lines, lineno)
+            statement = "\n".join(lines[first - 1:last])
+            removed_names.update(IDENTIFIER.findall(statement))
+
+            indent = re.match(r"\s*", lines[first - 1]).group()
+            # Keep a more-indented block that follows attached, whether or not
+            # the broken statement got as far as its colon
+            following = next((line for line in lines[last:] if line.strip()), "")
+            deeper = len(following) - len(following.lstrip()) > len(indent)
+            placeholder = "if True:" if deeper else "pass"
+            lines[first - 1] = indent + placeholder
+            for i in range(first, last):
+                lines[i] = ""
+            source = "\n".join(lines)
+
+    return None, diagnostics, removed_names
+
+
+# -------------------- Scope Analysis --------------------
+
+class Scope:
+    def __init__(self, kind: str, parent=None):
+        self.kind = kind            # "module", "class", "function" or "comprehension"
+        self.parent = parent
+        self.bindings = set()
+        self.globals = set()
+        self.nonlocals = set()
+        self.loads = []             # (name, node)
+        self.assignments = {}       # name -> first plain assignment node
+        self.used = set()
+        self.star_import = False
+        self.uses_locals = False
+
+
+class ScopeAnalyzer(ast.NodeVisitor):
+    """
+    Single walk over the tree that records bindings and loads per scope.
+    Loads are resolved once the walk is complete, so later definitions
+    (functions, module globals) count. With `rules` (a RuleSet), its AST
+    rules are matched against every node during the same walk.
+    """
+
+    def __init__(self, rules: RuleSet = None):
+        self.module = Scope("module")
+        self.scope = self.module
+        self.scopes = [self.module]
+        self.diagnostics = []
+        self.rules = rules.tree_match() if rules is not None else None
+        self.rule_types = set(self.rules.by_node) if self.rules is not None else set()
+
+    # Node type -> visit method, so dispatch is one dict lookup per node
+    _methods = {}
+
+    # Fields holding only Load/Store markers, never names or expressions
+    _SKIPPED_FIELDS = {"ctx"}
+    _child_fields = {}
+
+    @classmethod
+    def _method(cls, kind):
+        method = cls._methods.get(kind)
+        if method is None:
+            # Only this class's methods: NodeVisitor's visit_Constant is a slow compatibility shim
+            method = vars(cls).get("visit_" + kind.__name__, cls.generic_visit)
+            cls._methods[kind] = method
+        return method
+
+    def visit(self, node):
+        kind = type(node)
+        if kind in self.rule_types:
+            self.rules.node(node)
+        return (self._methods.get(kind) or self._method(kind))(self, node)
+
+    def generic_visit(self, node):
+        kind = type(node)
+        fields = self._child_fields.get(kind)
+        if fields is None:
+            fields = self._child_fields[kind] = tuple(f for f in kind._fields if f not in self._SKIPPED_FIELDS)
+        # visit() inlined: this loop reaches most nodes in the tree
+        methods, rule_types, AST = self._methods, self.rule_types, ast.AST
+        for field in fields:
+            value = getattr(node, field, None)
+            for child in value if isinstance(value, list) else (value,):
+                if isinstance(child, AST):
+                    kind = type(child)
+                    if kind in rule_types:
+                        self.rules.node(child)
+                    (methods.get(kind) or self._method(kind))(self, child)
+
+    def visit_Constant(self, node):
+        pass
+
+    # ---- scope helpers ----
+
+    def push(self, kind: str):
+        self.scope = Scope(kind, self.scope)
+        self.scopes.append(self.scope)
+        return self.scope
+
+    def pop(self):
+        self.scope = self.scope.parent
+
+    def bind(self, name: str, node, scope=None):
+        scope = scope or self.scope
+        if name in scope.nonlocals:
+            return  # bound in the enclosing function
+        if name in scope.globals:
+            scope = self.module
+        if name in BUILTIN_NAMES and name not in scope.bindings:
+            self.diagnostics.append(diagnostic(
+                node.lineno, node.col_offset + 1,
+                f"'{name}' shadows a built-in name", "WARNING", "PY102",
+            ))
+        scope.bindings.add(name)
+
+    def _binding_scope(self):
+        # Walrus targets inside comprehensions bind in the enclosing scope
+        scope = self.scope
+        while scope.kind == "comprehension":
+            scope = scope.parent
+        return scope
+
+    # ---- names ----
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store):
+            self.bind(node.id, node)
+        else:
+            self.scope.loads.append((node.id, node))
+            if node.id == "locals":
+                self.scope.uses_locals = True
+
+    def visit_Global(self, node):
+        self.scope.globals.update(node.names)
+
+    def visit_Nonlocal(self, node):
+        self.scope.nonlocals.update(node.names)
+
+    def visit_Assign(self, node):
+        self.visit(node.value)
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                self.scope.assignments.setdefault(target.id, target)
+            self.visit(target)
+
+    def visit_AnnAssign(self, node):
+        if node.value is not None:
+            self.visit(node.value)
+            if isinstance(node.target, ast.Name):
+                self.scope.assignments.setdefault(node.target.id, node.target)
+        self.visit(node.annotation)
+        self.visit(node.target)
+
+    def visit_AugAssign(self, node):
+        self.visit(node.value)
+        if isinstance(node.target, ast.Name):
+            # x += 1 reads x before writing it
+            self.scope.loads.append((node.target.id, node.target))
+            self.bind(node.target.id, node.target)
+        else:
+            self.visit(node.target)
+
+    def visit_NamedExpr(self, node):
+        self.visit(node.value)
+        self.bind(node.target.id, node.target, self._binding_scope())
+
+    # ---- imports ----
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.bind(alias.asname or alias.name.split(".")[0], node)
+
+    def visit_ImportFrom(self, node):
+        for alias in node.names:
+            if alias.name == "*":
+                self.scope.star_import = True
+            else:
+                self.bind(alias.asname or alias.name, node)
+
+    # ---- definitions ----
+
+    def _visit_arguments(self, args):
+        for default in args.defaults + [d for d in args.kw_defaults if d is not None]:
+            self.visit(default)
+
+    def _bind_arguments(self, args):
+        all_args = args.posonlyargs + args.args + args.kwonlyargs
+        all_args += [a for a in (args.vararg, args.kwarg) if a is not None]
+        for arg in all_args:
+            self.bind(arg.arg, arg)
+
+    def _visit_annotations(self, node):
+        args = node.args
+        for arg in args.posonlyargs + args.args + args.kwonlyargs + [args.vararg, args.kwarg]:
+            if arg is not None and arg.annotation is not None:
+                self.visit(arg.annotation)
+        if node.returns is not None:
+            self.visit(node.returns)
+
+    def visit_FunctionDef(self, node):
+        for decorator in node.decorator_list:
+            self.visit(decorator)
+        self._visit_arguments(node.args)
+        self._visit_annotations(node)
+        self.bind(node.name, node)
+
+        self.push("function")
+        self._bind_arguments(node.args)
+        for statement in node.body:
+            self.visit(statement)
+        self.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self._visit_arguments(node.args)
+        self.push("function")
+        self._bind_arguments(node.args)
+        self.visit(node.body)
+        self.pop()
+
+    def visit_ClassDef(self, node):
+        for expr in node.decorator_list + node.bases + node.keywords:
+            self.visit(expr)
+        self.push("class")
+        for statement in node.body:
+            self.visit(statement)
+        self.pop()
+        self.bind(node.name, node)
+
+    # ---- comprehensions ----
+
+    def _visit_comprehension(self, node, *elements):
+        # The first iterable is evaluated in the enclosing scope
+        self.visit(node.generators[0].iter)
+        self.push("comprehension")
+        for i, generator in enumerate(node.generators):
+            if i:
+                self.visit(generator.iter)
+            self.visit(generator.target)
+            for condition in generator.ifs:
+                self.visit(condition)
+        for element in elements:
+            self.visit(element)
+        self.pop()
 
-    error_block = "\n".join(errors)
+    def visit_ListComp(self, node):
+        self._visit_comprehension(node, node.elt)
 
-    prompt = f"""
+    visit_SetComp = visit_GeneratorExp = visit_ListComp
+
+    def visit_DictComp(self, node):
+        self._visit_comprehension(node, node.key, node.value)
+
+    # ---- other binding forms ----
+
+    def visit_ExceptHandler(self, node):
+        if node.type is not None:
+            self.visit(node.type)
+        if node.name:
+            self.bind(node.name, node)
+        for statement in node.body:
+            self.visit(statement)
+
+    def visit_MatchAs(self, node):
+        if node.pattern is not None:
+            self.visit(node.pattern)
+        if node.name:
+            self.bind(node.name, node)
+
+    def visit_MatchStar(self, node):
+        if node.name:
+            self.bind(node.name, node)
+
+    def visit_MatchMapping(self, node):
+        self.generic_visit(node)
+        if node.rest:
+            self.bind(node.rest, node)
+
+    # ---- resolution ----
+
+    def _resolve(self, scope, name: str):
+        """Returns the scope that binds name as seen from scope, or None."""
+        if name in scope.globals:
+            return self.module if name in self.module.bindings else None
+        current = scope
+        while current is not None:
+            # Class bodies are only visible to themselves
+            if current is scope or current.kind != "class":
+                if name in current.bindings:
+                    return current
+            current = current.parent
+        return None
+
+    def report(self, extra_names=()):
+        # A star import can define anything
+        check_undefined = not any(scope.star_import for scope in self.scopes)
+
+        for scope in self.scopes:
+            for name, node in scope.loads:
+                owner = self._resolve(scope, name)
+                if owner is not None:
+                    owner.used.add(name)
+                elif check_undefined and not (
+                    name in BUILTIN_NAMES or name in IMPLICIT_NAMES or name in extra_names
+                ):
+                    self.diagnostics.append(diagnostic(
+                        node.lineno, node.col_offset + 1,
+                        f"name '{name}' is not defined", "ERROR", "PY002",
+                    ))
+
+        for scope in self.scopes:
+            if scope.kind != "function" or scope.uses_locals:
+                continue
+            for name, node in scope.assignments.items():
+                if (
+                    name not in scope.used
+                    and name not in scope.globals
+                    and name not in scope.nonlocals
+                    and not name.startswith("_")
+                ):
+                    self.diagnostics.append(diagnostic(
+                        node.lineno, node.col_offset + 1,
+                        f"local variable '{name}' is assigned to but never used", "WARNING", "PY101",
+                    ))
+
+        if self.rules is not None:
+            self.diagnostics += self.rules.diagnostics()
+        return self.diagnostics
+
+
+# -------------------- Rules --------------------
+
+def _compares_to_none(node: ast.Compare) -> bool:
+    operands = [node.left, *node.comparators]
+    return any(
+        isinstance(op, (ast.Eq, ast.NotEq))
+        and any(isinstance(o, ast.Constant) and o.value is None for o in operands[i:i + 2])
+        for i, op in enumerate(node.ops)
+    )
+
+
+RULES = RuleSet("python", [
+    Rule(
+        "py-none-comparison", "PY103", "comparison to None should use 'is' or 'is not'",
+        severity="WARNING", node=ast.Compare, where=_compares_to_none,
+    ),
+])
+
+
+@contextmanager
+def _gc_paused():
+    # A large tree is millions of objects that all stay alive until the
+    # walk ends; cyclic collections in between would only rescan them
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def static_python_errors(code: str):
+    """
+    Returns diagnostics (errors and warnings) sorted by position.
+    One parse (plus one re-parse per recovered syntax error) and one tree
+    walk, which also evaluates the declarative rules.
+    """
+    with _gc_paused():
+        tree, diagnostics, removed_names = parse_with_recovery(code)
+
+        if tree is not None:
+            analyzer = ScopeAnalyzer(RULES)
+            analyzer.visit(tree)
+            diagnostics += analyzer.report(removed_names)
+
+    return sorted(diagnostics, key=lambda d: (d["line"], d["column"]))
+
+
+# -------------------- Line Checks --------------------
+
+CLOSING = {")": "(", "]": "[", "}": "{"}
+
+
+def static_errors_from_lines(lines):
+    """
+    Reduced check for files too large to parse whole: tokenizes line by
+    line, tracking bracket balance, so memory does not grow with the file.
+    Reports C-style for loops, mismatched brackets and the first
+    tokenizer error; scope analysis needs the full tree and is skipped.
+    """
+    diagnostics = []
+    brackets = []   # (char, line, column) of each open bracket
+
+    def readline():
+        for lineno, line in enumerate(lines, 1):
+            if C_STYLE_FOR.search(line):
+                diagnostics.append(diagnostic(lineno, 1, "C-style for loop not allowed", "ERROR", "PY003"))
+            yield line + "\n"
+
+    try:
+        for token in tokenize.generate_tokens(readline().__next__):
+            if token.type != tokenize.OP:
+                continue
+            line, column = token.start
+            if token.string in "([{":
+                brackets.append((token.string, line, column + 1))
+            elif token.string in CLOSING:
+                if brackets and brackets[-1][0] == CLOSING[token.string]:
+                    brackets.pop()
+                elif brackets:
+                    opener, open_line, _ = brackets.pop()
+                    diagnostics.append(diagnostic(
+                        line, column + 1,
+                        f"closing '{token.string}' does not match '{opener}' on line {open_line}", "ERROR", "PY001",
+                    ))
+                else:
+                    diagnostics.append(diagnostic(line, column + 1, f"unmatched '{token.string}'", "ERROR", "PY001"))
+                    # The tokenizer's own depth is now off; anything after would be noise
+                    break
+    except (tokenize.TokenError, SyntaxError) as e:
+        if isinstance(e, SyntaxError):
+            diagnostics.append(diagnostic(e.lineno or 1, e.offset or 1, e.msg, "ERROR", "PY001"))
+        elif brackets:
+            # Only unclosed brackets reach EOF; report the innermost opener
+            opener, line, column = brackets[-1]
+            diagnostics.append(diagnostic(line, column, f"'{opener}' was never closed", "ERROR", "PY001"))
+        else:
+            diagnostics.append(diagnostic(e.args[1][0], 1, e.args[0], "ERROR", "PY001"))
+
+    return sorted(diagnostics, key=lambda d: (d["line"], d["column"]))
+
+
+PROMPT_TEMPLATE = """
 Fix the Python code below.
-Return ONLY corrected Python code.
+Return ONLY {output}.
 
 Errors:
-{error_block}
+{errors}
 
 Code:
 {code}
 """
 
-    response = requests.post(
-        "http://localhost:11434/api/generate",
-        json={"model": "phi", "prompt": prompt, "options": {"temperature": 0}},
-        stream=True
-    )
 
-    fixed_code = ""
-    for line in response.iter_lines():
-        if line:
-            fixed_code += json.loads(line.decode())["response"]
+def build_prompt(code: str, errors: list):
+    blocking = [d for d in errors if d["severity"] == "ERROR"]
+    if not blocking:
+        return None
+    return prompt_builder.build_prompt(PROMPT_TEMPLATE, code, blocking, "python")
+
+
+def apply_fix(code: str, errors: list, response: str):
+    # Large files are sent as excerpts; put the fixed ones back (None if unmatched)
+    blocking = [d for d in errors if d["severity"] == "ERROR"]
+    return prompt_builder.stitch(PROMPT_TEMPLATE, code, blocking, "python", response)
+
+
+def build_result(code: str, errors: list, solution: str = ""):
+    warnings = [d for d in errors if d["severity"] != "ERROR"]
+    errors = [d for d in errors if d["severity"] == "ERROR"]
+
+    if not errors:
+        return {
+            "errors": [],
+            "warnings": warnings,
+            "hint": "No errors found. Your code is correct.",
+            "solution": "",
+            "additional_tips": ""
+        }
 
     return {
-        "errors": [{"line": 0, "message": e, "severity": "ERROR", "code": "PY001"} for e in errors],
-        "warnings": [],
+        "errors": errors,
+        "warnings": warnings,
         "hint": "Fix the Python syntax errors shown above.",
-        "solution": fixed_code,
+        "solution": solution,
         "additional_tips": "- Use proper indentation\n- Define variables before use"
     }
+
+
+async def review_with_llm(code: str):
+    errors = static_python_errors(code)
+    prompt = build_prompt(code, errors)
+
+    if prompt is None:
+        return build_result(code, errors)
+
+    try:
+        fixed_code = await generate(prompt)
+    except LLMUnavailable:
+        return fix_unavailable(build_result(code, errors))
+
+    solution = apply_fix(code, errors, fixed_code)
+    if solution is None:
+        return fix_unavailable(build_result(code, errors))
+    return build_result(code, errors, solution)
@@ -0,0 +1,187 @@
+import importlib
+import threading
+from importlib.metadata import entry_points
+
+# Third-party analyzers register under this entry point group; each entry
+# point must resolve to an AnalyzerSpec.
+ENTRY_POINT_GROUP = "bugfinder.analyzers"
+
+# Module attributes each capability relies on
+CAPABILITY_ATTRIBUTES = {
+    "llm_fix": ("build_prompt", "apply_fix"),
+    "incremental": ("scan_line", "errors_from_line_facts"),
+    "line_stream": ("static_errors_from_lines",),
+}
+
+
+class AnalyzerSpec:
+    """
+    What the service knows about an analyzer before importing it: routing
+    (extensions, detection signatures) and capabilities. The module is
+    imported on first use.
+
+    Every analyzer module provides ANALYZER_VERSION, build_prompt,
+    build_result, review_with_llm and the function named by static_check.
+    """
+
+    def __init__(self, language, module, static_check, extensions=(), signatures=(),
+                 capabilities=(), priority=100):
+        self.language = language
+        self.module = module
+        self.static_check = static_check
+        self.extensions = tuple(extensions)
+        self.signatures = tuple(signatures)       # (regex, weight), most specific first
+        self.capabilities = frozenset(capabilities)
+        self.priority = priority                  # detection tie-break, lower wins
+        self._loaded = None
+        self._lock = threading.Lock()
+
+    def supports(self, capability: str) -> bool:
+        return capability in self.capabilities
+
+    def load(self):
+        """Imports the analyzer. Returns (static check, module)."""
+        if self._loaded is None:
+            with self._lock:
+                if self._loaded is None:
+                    module = importlib.import_module(self.module)
+                    for capability in self.capabilities:
+                        for attribute in CAPABILITY_ATTRIBUTES.get(capability, ()):
+                            if not hasattr(module, attribute):
+                                raise ImportError(
+                                    f"{self.module} declares '{capability}' but has no {attribute}"
+                                )
+                    self._loaded = (getattr(module, self.static_check), module)
+        return self._loaded
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded is not None
+
+
+# -------------------- Built-in Analyzers --------------------
+
+BUILTIN = [
+    AnalyzerSpec(
+        "cpp", "analyzers.cpp_analyzer", "static_cpp_errors",
+        extensions=(".cpp", ".cc", ".cxx", ".hpp", ".hh"),
+        signatures=(
+            (r"#include\s*<iostream>", 6),
+            (r"using\s+namespace\s+std", 6),
+            (r"\bcout\s*<<", 3),
+            (r"\bcin\s*>>", 3),
+        ),
+        capabilities=("llm_fix", "incremental", "line_stream"),
+        priority=0,
+    ),
+    AnalyzerSpec(
+        "java", "analyzers.java_analyzer", "static_java_errors",
+        extensions=(".java",),
+        signatures=(
+            (r"\bpublic\s+class\b", 5),
+            (r"\bsystem\.out\.println\b", 5),
+            (r"\bimport\s+java\.", 5),
+        ),
+        priority=1,
+    ),
+    AnalyzerSpec(
+        "c", "analyzers.c_analyzer", "static_c_errors",
+        extensions=(".c", ".h"),
+        signatures=(
+            (r"#include\s*<stdio\.h>", 3),
+            (r"\bprintf\s*\(", 2),
+            (r"\bscanf\s*\(", 2),
+        ),
+        capabilities=("llm_fix", "incremental", "line_stream"),
+        priority=2,
+    ),
+    AnalyzerSpec(
+        "javascript", "analyzers.javascript_analyzer", "static_javascript_errors",
+        extensions=(".js", ".mjs", ".cjs"),
+        signatures=(
+            (r"\bconsole\.log\s*\(", 5),
+            (r"\bfunction\s", 2),
+            (r"=>", 1),
+            (r"\blet\s", 1),
+            (r"\bconst\s", 1),
+            (r"\bvar\s", 1),
+        ),
+        priority=3,
+    ),
+    AnalyzerSpec(
+        "python", "analyzers.python_analyzer", "static_python_errors",
+        extensions=(".py",),
+        signatures=(
+            (r"\bdef\s", 2),
+            (r"\bimport\s", 1),
+            (r"\bprint\s*\(", 1),
+        ),
+        capabilities=("llm_fix", "line_stream"),
+        priority=4,
+    ),
+]
+
+# -------------------- Registry --------------------
+
+_specs = None
+_registry_lock = threading.Lock()
+
+
+def _registry():
+    global _specs
+    if _specs is None:
+        with _registry_lock:
+            if _specs is None:
+                specs = {spec.language: spec for spec in BUILTIN}
+                for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                    spec = entry_point.load()
+                    specs[spec.language] = spec
+                _specs = specs
+    return _specs
+
+
+def register(spec: AnalyzerSpec):
+    """
+    Adds or replaces an analyzer. Call before the first request;
+    the language detector compiles its signatures once.
+    """
+    _registry()[spec.language] = spec
+    return spec
+
+
+def get_spec(language: str):
+    return _registry().get(language)
+
+
+def is_supported(language: str) -> bool:
+    return language in _registry()
+
+
+def load(language: str):
+    """Returns (static check, module) for language, importing it if needed."""
+    return _registry()[language].load()
+
+
+def languages():
+    return list(_registry())
+
+
+def language_for_extension(extension: str):
+    for spec in _registry().values():
+        if extension in spec.extensions:
+            return spec.language
+    return None
+
+
+def extensions():
+    return {extension for spec in _registry().values() for extension in spec.extensions}
+
+
+def signatures():
+    """(language, pattern, weight) for every analyzer, in detection order."""
+    ordered = sorted(_registry().values(), key=lambda spec: spec.priority)
+    return [(spec.language, pattern, weight) for spec in ordered for pattern, weight in spec.signatures]
+
+
+def priority_order():
+    return [spec.language for spec in sorted(_registry().values(), key=lambda spec: spec.priority)]
@@ -0,0 +1,279 @@
+import ast
+import os
+import re
+import threading
+import time
+
+# -------------------- Rules --------------------
+
+class Rule:
+    """
+    One declarative check. Give exactly one pattern:
+      tokens     space-separated token texts; /regex/ matches one token
+      substring  source text, lexed into a token sequence (so whitespace,
+                 comments and strings do not matter)
+      regex      pattern over the raw source
+      node       AST node class (Python), with an optional where(node)
+
+    A rule reports each match, only its first (once=True), or a single
+    whole-file diagnostic when nothing matches (missing=True). `unless`
+    is a token pattern whose presence anywhere silences the rule.
+    Rules with enabled=False only run when listed in RULES_ENABLED.
+    """
+
+    def __init__(self, id, code, message, severity="ERROR", tokens=None, substring=None, regex=None,
+                 node=None, where=None, missing=False, once=False, unless=None, enabled=True):
+        if sum(p is not None for p in (tokens, substring, regex, node)) != 1:
+            raise ValueError(f"Rule {id} needs exactly one pattern")
+        self.id = id
+        self.code = code
+        self.message = message
+        self.severity = severity
+        self.tokens = tokens
+        self.substring = substring
+        self.regex = regex
+        self.node = node
+        self.where = where
+        self.missing = missing
+        self.once = once
+        self.unless = unless
+        self.enabled = enabled
+
+
+def _setting(name: str):
+    return {item.strip() for item in os.getenv(name, "").split(",") if item.strip()}
+
+
+# -------------------- Lexer --------------------
+
+_C_LIKE_TOKEN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?|`(?:[^`\\]|\\.)*`?)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<number>\.?\d[\w.]*)
+  | (?P<punct>===|!==|>>>=?|\.\.\.|=>|->|::|\+\+|--|&&|\|\||\?\?|[-+*/%&|^!=<>]=|<<|>>|\S)
+""", re.VERBOSE | re.DOTALL)
+
+
+def lex_c_like(code: str):
+    """(kind, text, line, column) for Java, JavaScript and other C-syntax code; comments dropped."""
+    tokens = []
+    line, line_start = 1, 0
+    position = 0
+    for match in _C_LIKE_TOKEN.finditer(code):
+        start = match.start()
+        newlines = code.count("\n", position, start)
+        if newlines:
+            line += newlines
+            line_start = code.rfind("\n", position, start) + 1
+        position = start
+        if match.lastgroup != "comment":
+            tokens.append((match.lastgroup, match.group(), line, start - line_start + 1))
+    return tokens
+
+
+# -------------------- Compiled Rule Sets --------------------
+
+def _element(text: str):
+    """A literal token, or a compiled regex for /.../."""
+    if len(text) > 2 and text.startswith("/") and text.endswith("/"):
+        return re.compile(text[1:-1])
+    return text
+
+
+def _matches(element, text: str) -> bool:
+    return element == text if isinstance(element, str) else element.fullmatch(text) is not None
+
+
+class RuleSet:
+    """
+    A language's rules, compiled on first use:
+      - token rules are indexed by their first token and checked together
+        in one pass over the token stream
+      - regex rules are joined into one alternation and scan the source once
+        (where two match at the same position, the one listed first wins)
+      - AST rules are dispatched by node type from the analyzer's own tree
+        walk (see tree_match), so they add no walk of their own
+    RULES_DISABLED / RULES_ENABLED (comma-separated rule ids) are read at
+    compile time. Counters cover checks run in this process; with
+    RULES_PROFILE=1 each rule's matching time is measured as well.
+    """
+
+    def __init__(self, language: str, rules: list, lexer=lex_c_like):
+        self.language = language
+        self.rules = rules
+        self.lexer = lexer
+        self._compiled = False
+        self._lock = threading.Lock()
+
+    def _compile(self):
+        disabled, enabled = _setting("RULES_DISABLED"), _setting("RULES_ENABLED")
+        active = [r for r in self.rules if r.id not in disabled and (r.enabled or r.id in enabled)]
+
+        self.active = active
+        self.counters = {r.id: {"evaluations": 0, "matches": 0, "seconds": 0.0} for r in active}
+        self.profile = os.getenv("RULES_PROFILE", "0") == "1"
+
+        # (rule id or unless key, pattern elements), indexed by a literal first element
+        self._by_first = {}
+        self._regex_first = []
+        self._unless = {}
+        for rule in active:
+            if rule.tokens is not None or rule.substring is not None:
+                self._index(rule.id, self._pattern(rule))
+            if rule.unless is not None:
+                key = ("unless", rule.id)
+                self._unless[rule.id] = key
+                self._index(key, self._pattern(rule, rule.unless))
+
+        regex_rules = [r for r in active if r.regex is not None]
+        self._regex_ids = {f"r{i}": rule.id for i, rule in enumerate(regex_rules)}
+        self._regex = re.compile(
+            "(?=" + "|".join(f"(?P<r{i}>{rule.regex})" for i, rule in enumerate(regex_rules)) + ")",
+            re.MULTILINE,
+        ) if regex_rules else None
+
+        self._by_node = {}
+        for rule in active:
+            if rule.node is not None:
+                self._by_node.setdefault(rule.node, []).append(rule)
+        self._text_rules = [r for r in active if r.node is None]
+        self._tree_rules = [r for r in active if r.node is not None]
+
+        _compiled_sets.append(self)
+        self._compiled = True
+
+    def _pattern(self, rule: Rule, text: str = None):
+        if text is None and rule.substring is not None:
+            return [token[1] for token in self.lexer(rule.substring)]
+        return [_element(part) for part in (text if text is not None else rule.tokens).split()]
+
+    def _index(self, key, pattern: list):
+        if isinstance(pattern[0], str):
+            self._by_first.setdefault(pattern[0], []).append((key, pattern))
+        else:
+            self._regex_first.append((key, pattern))
+
+    def _ensure_compiled(self):
+        if not self._compiled:
+            with self._lock:
+                if not self._compiled:
+                    self._compile()
+
+    # ---- matching ----
+
+    def _scan_tokens(self, tokens: list, hits: dict):
+        profile = self.profile
+        for i, (_, text, line, column) in enumerate(tokens):
+            candidates = self._by_first.get(text, ())
+            if self._regex_first:
+                candidates = list(candidates) + self._regex_first
+            for key, pattern in candidates:
+                start = time.perf_counter() if profile else 0.0
+                matched = (
+                    i + len(pattern) <= len(tokens)
+                    and all(_matches(p, tokens[i + j][1]) for j, p in enumerate(pattern))
+                )
+                counter = self.counters.get(key)
+                if counter is not None:
+                    counter["evaluations"] += 1
+                    if profile:
+                        counter["seconds"] += time.perf_counter() - start
+                if matched:
+                    hits.setdefault(key, []).append((line, column))
+
+    def _scan_regex(self, code: str, hits: dict):
+        line, line_start, position = 1, 0, 0
+        for match in self._regex.finditer(code):
+            start = match.start()
+            newlines = code.count("\n", position, start)
+            if newlines:
+                line += newlines
+                line_start = code.rfind("\n", position, start) + 1
+            position = start
+            hits.setdefault(self._regex_ids[match.lastgroup], []).append((line, start - line_start + 1))
+
+    def _report(self, hits: dict, rules: list):
+        diagnostics = []
+        for rule in rules:
+            found = hits.get(rule.id, [])
+            if rule.id in self._unless and self._unless[rule.id] in hits:
+                continue
+            if rule.missing:
+                if not found:
+                    diagnostics.append(_diagnostic(rule, 0, 0))
+                    self.counters[rule.id]["matches"] += 1
+                continue
+            for line, column in found[:1] if rule.once else found:
+                diagnostics.append(_diagnostic(rule, line, column))
+            self.counters[rule.id]["matches"] += min(len(found), 1) if rule.once else len(found)
+        return diagnostics
+
+    def check(self, code: str):
+        """Diagnostics from every token, substring and regex rule."""
+        self._ensure_compiled()
+        hits = {}
+        if self._by_first or self._regex_first:
+            self._scan_tokens(self.lexer(code), hits)
+        if self._regex is not None:
+            start = time.perf_counter() if self.profile else 0.0
+            self._scan_regex(code, hits)
+            if self.profile:
+                # One shared scan; its time is split evenly between the regex rules
+                share = (time.perf_counter() - start) / len(self._regex_ids)
+                for rule_id in self._regex_ids.values():
+                    self.counters[rule_id]["seconds"] += share
+        return self._report(hits, self._text_rules)
+
+    def tree_match(self):
+        """A TreeMatch for one tree; feed it every node the caller visits."""
+        self._ensure_compiled()
+        return TreeMatch(self)
+
+
+class TreeMatch:
+    """
+    AST rules riding on someone else's walk: call node() for each node
+    visited, then diagnostics() once the walk is done.
+    """
+
+    def __init__(self, rule_set: RuleSet):
+        self.rule_set = rule_set
+        self.by_node = rule_set._by_node
+        self.hits = {}
+
+    def node(self, node: ast.AST):
+        rules = self.by_node.get(type(node))
+        if not rules:
+            return
+        rule_set = self.rule_set
+        for rule in rules:
+            start = time.perf_counter() if rule_set.profile else 0.0
+            matched = rule.where is None or rule.where(node)
+            counter = rule_set.counters[rule.id]
+            counter["evaluations"] += 1
+            if rule_set.profile:
+                counter["seconds"] += time.perf_counter() - start
+            if matched:
+                self.hits.setdefault(rule.id, []).append((node.lineno, node.col_offset + 1))
+
+    def diagnostics(self):
+        return self.rule_set._report(self.hits, self.rule_set._tree_rules)
+
+
+def _diagnostic(rule: Rule, line: int, column: int):
+    return {"line": line, "column": column, "message": rule.message, "severity": rule.severity, "code": rule.code}
+
+
+# -------------------- Stats --------------------
+
+_compiled_sets = []
+
+
+def rule_stats():
+    """(language, rule id, counters) for every compiled rule set."""
+    return [
+        (rule_set.language, rule_id, dict(counter))
+        for rule_set in list(_compiled_sets)
+        for rule_id, counter in rule_set.counters.items()
+    ]
@@ -0,0 +1,286 @@
+import asyncio
+import io
+import logging
+import lzma
+import os
+import posixpath
+import tarfile
+import zipfile
+import zlib
+
+from analysis_pool import AnalysisTimeout, static_errors
+from analyzers import registry
+from cache import cache_key, get_cache
+from fix_reuse import get_fix_index
+from language_detector import detect_language
+from llm.ollama_client import default_model
+from llm.dispatcher import BATCH, LLMUnavailable, generate
+from metrics import timed
+from router import analysis_timed_out, language_mismatch
+
+logger = logging.getLogger(__name__)
+
+# -------------------- Limits --------------------
+
+def _limit(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def max_files() -> int:
+    return _limit("BATCH_MAX_FILES", 5000)
+
+
+def max_file_bytes() -> int:
+    return _limit("BATCH_MAX_FILE_BYTES", 1024 * 1024)
+
+
+def max_archive_bytes() -> int:
+    return _limit("BATCH_MAX_ARCHIVE_BYTES", 200 * 1024 * 1024)
+
+
+class BatchError(ValueError):
+    """Raised when a batch or archive is rejected as a whole."""
+
+
+# -------------------- Routing --------------------
+
+def resolve_language(path: str, code: str, language: str = None):
+    if language:
+        return language.lower()
+    by_extension = registry.language_for_extension(posixpath.splitext(path.lower())[1])
+    if by_extension:
+        return by_extension
+    detected = detect_language(code)
+    return None if detected == "unknown" else detected
+
+
+# -------------------- Archives --------------------
+
+# What zipfile, tarfile and the decompressors raise for damaged, truncated
+# or encrypted archives
+_UNREADABLE = (
+    zipfile.BadZipFile, tarfile.TarError, EOFError, RuntimeError,
+    NotImplementedError, OSError, zlib.error, lzma.LZMAError,
+)
+
+
+async def receive_archive(chunks) -> bytes:
+    """Reads an uploaded archive, stopping as soon as it passes the size limit."""
+    data = bytearray()
+    async for chunk in chunks:
+        data += chunk
+        if len(data) > max_archive_bytes():
+            raise BatchError("Archive exceeds size limit")
+    return bytes(data)
+
+
+def read_archive(data: bytes):
+    """
+    Extracts analyzable source files from a zip or tar(.gz/.bz2/.xz) archive.
+    Returns a list of (path, code). Files with unknown extensions,
+    oversized files and non-UTF-8 files are skipped. A damaged archive
+    raises BatchError. Blocking; run it off the event loop.
+    """
+    if len(data) > max_archive_bytes():
+        raise BatchError("Archive exceeds size limit")
+
+    entries = []
+    budget = max_archive_bytes()
+    extensions = registry.extensions()
+
+    def accept(path: str, size: int):
+        nonlocal budget
+        if posixpath.splitext(path.lower())[1] not in extensions:
+            return False
+        if size > max_file_bytes():
+            return False
+        budget -= size
+        if budget < 0:
+            raise BatchError("Archive expands beyond size limit")
+        return True
+
+    def add(path: str, raw: bytes):
+        try:
+            entries.append((path, raw.decode("utf-8")))
+        except UnicodeDecodeError:
+            pass
+
+    buffer = io.BytesIO(data)
+    if zipfile.is_zipfile(buffer):
+        try:
+            with zipfile.ZipFile(buffer) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and accept(info.filename, info.file_size):
+                        add(info.filename, archive.read(info))
+        except _UNREADABLE as e:
+            raise BatchError(f"Archive is damaged or encrypted: {e}")
+    else:
+        buffer.seek(0)
+        try:
+            archive = tarfile.open(fileobj=buffer, mode="r:*")
+        except tarfile.TarError:
+            raise BatchError("Upload is not a zip or tar archive")
+        try:
+            with archive:
+                for member in archive:
+                    if member.isfile() and accept(member.name, member.size):
+                        add(member.name, archive.extractfile(member).read())
+        except _UNREADABLE as e:
+            raise BatchError(f"Archive is damaged or truncated: {e}")
+
+    if len(entries) > max_files():
+        raise BatchError(f"Archive contains more than {max_files()} source files")
+    return entries
+
+
+# -------------------- Batch Analysis --------------------
+
+async def _fix_one(job, results: dict):
+    digest, language, code, errors, prompt = job
+    _, analyzer = registry.load(language)
+    fixes = get_fix_index()
+    # Earlier files in the batch may already have fixed a near-duplicate
+    solution = await asyncio.to_thread(fixes.lookup, language, code, errors) if fixes else None
+    if solution is None:
+        try:
+            solution = analyzer.apply_fix(code, errors, await generate(prompt, priority=BATCH))
+        except LLMUnavailable:
+            return  # keep the static-only result
+        if solution is None:
+            return  # excerpts could not be stitched back
+        if fixes is not None:
+            await asyncio.to_thread(fixes.remember, language, code, errors, solution)
+    results[digest] = analyzer.build_result(code, errors, solution)
+    await get_cache().set_async(digest, results[digest])
+
+
+async def _fix_worker(queue: asyncio.Queue, results: dict):
+    while True:
+        job = await queue.get()
+        try:
+            await _fix_one(job, results)
+        except Exception:
+            # One bad file keeps its static result; the worker must live on,
+            # or the batch waits forever on a queue nobody drains
+            logger.exception("Fix failed for a batch file (%s)", job[1])
+        finally:
+            queue.task_done()
+
+
+async def analyze_batch(files, include_fixes: bool = True):
+    """
+    Analyzes many files at once.
+    files: iterable of (path, code, language or None)
+
+    Identical files are analyzed once, static checks run across the
+    process pool (each under the analysis timeout), and LLM fixes go
+    through a bounded queue.
+    """
+    files = list(files)
+    if len(files) > max_files():
+        raise BatchError(f"Batch exceeds {max_files()} files")
+
+    report = []
+    unique = {}     # digest -> (language, code)
+    results = {}    # digest -> result
+
+    for path, code, chosen in files:
+        language = resolve_language(path, code, chosen)
+        entry = {"path": path, "language": language}
+        report.append(entry)
+
+        # Explicitly chosen languages get the same hard stop as /analyze
+        mismatch = language_mismatch(language, code) if chosen else None
+        if mismatch:
+            entry["result"] = mismatch
+            continue
+
+        if language is None:
+            entry["skipped"] = "Could not determine language"
+            continue
+        if not registry.is_supported(language):
+            entry["skipped"] = f"Unsupported language: {language}"
+            continue
+
+        # The cache key doubles as the de-duplication key
+        _, analyzer = registry.load(language)
+        digest = cache_key(
+            language, code, analyzer.ANALYZER_VERSION, default_model(),
+            getattr(analyzer, "PROMPT_TEMPLATE", ""),
+        )
+        entry["digest"] = digest
+        if digest not in unique:
+            unique[digest] = (language, code)
+
+    # Cached results need no work at all
+    pending = []
+    for digest in unique:
+        cached = await get_cache().get_async(digest)
+        if cached is not None:
+            results[digest] = cached
+        else:
+            pending.append(digest)
+
+    async def static_pass(digest):
+        language, code = unique[digest]
+        try:
+            return await static_errors(language, code, inline=False)
+        except AnalysisTimeout as e:
+            results[digest] = analysis_timed_out(language, e)
+            return None
+
+    # Static checks in parallel across processes
+    with timed("batch_static"):
+        found = await asyncio.gather(*(static_pass(digest) for digest in pending))
+
+    queue = asyncio.Queue(maxsize=_limit("BATCH_LLM_QUEUE_SIZE", 64))
+    workers = [
+        asyncio.create_task(_fix_worker(queue, results))
+        for _ in range(_limit("BATCH_LLM_CONCURRENCY", 2))
+    ] if include_fixes else []
+
+    try:
+        for digest, errors in zip(pending, found):
+            if errors is None:
+                continue  # timed out; not cached
+            language, code = unique[digest]
+            _, analyzer = registry.load(language)
+            prompt = analyzer.build_prompt(code, errors) if errors else None
+
+            if prompt is None:
+                results[digest] = analyzer.build_result(code, errors)
+                await get_cache().set_async(digest, results[digest])
+                continue
+
+            # Static result stands until (unless) a fix arrives
+            results[digest] = {**analyzer.build_result(code, errors), "solution": ""}
+            if include_fixes:
+                await queue.put((digest, language, code, errors, prompt))
+
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+    first_path = {}
+    for entry in report:
+        digest = entry.pop("digest", None)
+        if digest is None:
+            continue
+        if digest in first_path:
+            entry["duplicate_of"] = first_path[digest]
+        else:
+            first_path[digest] = entry["path"]
+        entry["result"] = results[digest]
+
+    return {
+        "files": report,
+        "summary": {
+            "files": len(report),
+            "analyzed": len(unique),
+            "cached": len(unique) - len(pending),
+            "skipped": sum(1 for entry in report if "skipped" in entry),
+            "with_errors": sum(1 for entry in report if entry.get("result", {}).get("errors")),
+        },
+    }
+
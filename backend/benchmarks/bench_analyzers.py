@@ -0,0 +1,119 @@
+"""
+Static-pass, prompt-size and review_with_llm benchmarks for every analyzer.
+
+Run from backend/:
+    python -m benchmarks.bench_analyzers [--sizes small,medium,large] [--output out.json]
+
+The review_with_llm runs talk to an in-process stub Ollama server,
+so no network or model is needed.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import emit, environment, measure, summarize
+from benchmarks.corpus import SIZES, generate
+from benchmarks.stub_ollama import StubOllama
+
+# Fewer repetitions as inputs grow
+REPEAT = {"small": 200, "medium": 20, "large": 5, "huge": 2}
+
+
+def bench_static(sizes):
+    from analyzers import registry
+
+    results = []
+    for language in registry.languages():
+        static_check, _ = registry.load(language)
+        for size in sizes:
+            code = generate(language, SIZES[size])
+            latency, peak_kib = measure(lambda: static_check(code), REPEAT[size])
+            results.append({
+                "language": language,
+                "size": size,
+                "chars": len(code),
+                "latency": latency,
+                "peak_alloc_kib": peak_kib,
+            })
+    return results
+
+
+def bench_prompts(sizes):
+    """Estimated prompt tokens per LLM-backed analyzer, against sending the whole file."""
+    from analyzers import registry
+    from llm.prompt_builder import estimate_tokens
+
+    results = []
+    for language in registry.languages():
+        if not registry.get_spec(language).supports("llm_fix"):
+            continue
+        static_check, module = registry.load(language)
+        for size in sizes:
+            code = generate(language, SIZES[size])
+            prompt = module.build_prompt(code, static_check(code))
+            if prompt is None:
+                continue
+            results.append({
+                "language": language,
+                "size": size,
+                "whole_file_tokens": estimate_tokens(code),
+                "prompt_tokens": estimate_tokens(prompt),
+            })
+    return results
+
+
+async def bench_review(repeat: int, tokens: int, token_latency: float):
+    stub = StubOllama(tokens=tokens, token_latency=token_latency, first_token_latency=token_latency)
+    port = await stub.start()
+    os.environ["OLLAMA_URL"] = f"http://127.0.0.1:{port}"
+
+    from analyzers import c_analyzer, cpp_analyzer, java_analyzer, javascript_analyzer, python_analyzer
+    from llm.ollama_client import close_client
+
+    analyzers = {
+        "python": python_analyzer, "javascript": javascript_analyzer,
+        "java": java_analyzer, "c": c_analyzer, "cpp": cpp_analyzer,
+    }
+    results = []
+    try:
+        for language, module in analyzers.items():
+            timings = []
+            for i in range(repeat):
+                # Distinct code per run so coalescing never kicks in
+                code = generate(language, SIZES["small"], tag=f"run {i}")
+                start = time.perf_counter()
+                await module.review_with_llm(code)
+                timings.append(time.perf_counter() - start)
+            results.append({"language": language, "latency": summarize(timings)})
+    finally:
+        await close_client()
+        await stub.stop()
+    return results
+
+
+def run(sizes, review_repeat: int = 10, tokens: int = 20, token_latency: float = 0.005):
+    return {
+        "benchmark": "analyzers",
+        "environment": environment(),
+        "static": bench_static(sizes),
+        "prompts": bench_prompts(sizes),
+        "review_with_llm": asyncio.run(bench_review(review_repeat, tokens, token_latency)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="small,medium,large", help=f"comma list of {','.join(SIZES)}")
+    parser.add_argument("--review-repeat", type=int, default=10)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    emit(run(sizes, args.review_repeat, args.tokens, args.token_latency), args.output)
+
+
+if __name__ == "__main__":
+    main()
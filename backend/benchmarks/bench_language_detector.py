@@ -0,0 +1,60 @@
+"""
+Language detector micro-benchmark and accuracy check.
+
+Run from backend/:
+    python -m benchmarks.bench_language_detector [--output out.json]
+"""
+import argparse
+import timeit
+
+from benchmarks.common import emit, environment
+from benchmarks.detector_corpus import SAMPLES
+from language_detector import detect_language
+
+SIZES = [100, 10_000, 1_000_000, 10_000_000]
+
+
+def accuracy():
+    misses = [
+        {"expected": expected, "detected": detect_language(code), "code": code[:60]}
+        for expected, code in SAMPLES
+        if detect_language(code) != expected
+    ]
+    return {
+        "samples": len(SAMPLES),
+        "correct": len(SAMPLES) - len(misses),
+        "accuracy": round(1 - len(misses) / len(SAMPLES), 4),
+        "misses": misses,
+    }
+
+
+def timings(sizes=SIZES):
+    # Worst case: no signature matches, so every position is tried
+    filler = "x = y + z  # nothing to see here\n"
+    results = []
+    for size in sizes:
+        code = (filler * (size // len(filler) + 1))[:size]
+        runs = 20 if size <= 1_000_000 else 5
+        seconds = min(timeit.repeat(lambda: detect_language(code), number=runs, repeat=3)) / runs
+        results.append({"chars": size, "microseconds": round(seconds * 1e6, 2)})
+    return results
+
+
+def run(sizes=SIZES):
+    return {
+        "benchmark": "language_detector",
+        "environment": environment(),
+        "accuracy": accuracy(),
+        "timings": timings(sizes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    emit(run(), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Static-analysis throughput of the process pool by worker count. Each
+check runs through analysis_pool exactly as /analyze does for large
+inputs; efficiency 1.0 means perfectly linear scaling.
+
+Run from backend/:
+    python -m benchmarks.bench_scaling [--workers 1 2 4] [--files 32] [--output out.json]
+
+Numbers past the machine's core count only measure oversubscription.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import emit, environment
+from benchmarks.corpus import generate
+
+
+async def _throughput(workers: int, codes):
+    import analysis_pool
+
+    os.environ["ANALYSIS_WORKERS"] = str(workers)
+    analysis_pool.shutdown_pool()
+    try:
+        # Warm up: start the processes and import the analyzer in each
+        await asyncio.gather(*(analysis_pool.static_errors("python", codes[0], inline=False) for _ in range(workers)))
+        start = time.perf_counter()
+        await asyncio.gather(*(analysis_pool.static_errors("python", code, inline=False) for code in codes))
+        return len(codes) / (time.perf_counter() - start)
+    finally:
+        analysis_pool.shutdown_pool()
+
+
+def run(workers=None, files: int = 32, lines: int = 5000):
+    workers = workers or sorted({1, 2, os.cpu_count() or 1})
+    codes = [generate("python", lines, tag=str(i)) for i in range(files)]
+    results = []
+    base = None
+    for count in workers:
+        rate = asyncio.run(_throughput(count, codes))
+        base = base or rate / count
+        results.append({
+            "workers": count,
+            "files_per_second": round(rate, 2),
+            "efficiency": round(rate / (base * count), 3),
+        })
+    return {
+        "benchmark": "scaling",
+        "environment": environment(),
+        "cpu_count": os.cpu_count(),
+        "lines_per_file": lines,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+")
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--lines", type=int, default=5000)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    emit(run(args.workers, args.files, args.lines), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to import the app,
+how much memory that costs and which analyzers got imported along the way
+(none should be - they load on first use).
+
+Run from backend/:
+    python -m benchmarks.bench_startup [--runs 5] [--target 1.5] [--output out.json]
+
+Exits non-zero if the median import time exceeds --target seconds.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from benchmarks.common import emit, environment
+
+# Median import time allowed before the benchmark fails
+STARTUP_TARGET_SECONDS = 1.5
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+from analyzers import registry
+print(json.dumps({
+    "seconds": seconds,
+    "rss_mib": rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    "analyzers_loaded": [l for l in registry.languages() if registry.get_spec(l).module in sys.modules],
+}))
+"""
+
+
+def probe():
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs: int = 5, target: float = STARTUP_TARGET_SECONDS):
+    samples = [probe() for _ in range(runs)]
+    median = statistics.median(s["seconds"] for s in samples)
+    return {
+        "benchmark": "startup",
+        "environment": environment(),
+        "runs": runs,
+        "import_p50_ms": round(median * 1000, 1),
+        "rss_mib": round(statistics.median(s["rss_mib"] for s in samples), 1),
+        "analyzers_loaded": samples[-1]["analyzers_loaded"],
+        "target_seconds": target,
+        "within_target": median <= target,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET_SECONDS)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.target)
+    emit(report, args.output)
+    if not report["within_target"]:
+        print(f"Startup {report['import_p50_ms']} ms exceeds target {args.target} s", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Shared helpers for the benchmark scripts."""
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+
+def percentile(values, pct: float):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(seconds: list):
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(seconds),
+        "mean_ms": round(statistics.fmean(seconds) * 1000, 4) if seconds else 0.0,
+        "p50_ms": round(percentile(seconds, 50) * 1000, 4),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 4),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 4),
+        "max_ms": round(max(seconds) * 1000, 4) if seconds else 0.0,
+    }
+
+
+def measure(fn, repeat: int):
+    """Runs fn repeat times; returns (latency summary, peak traced allocation in KiB)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(timings), round(peak / 1024, 1)
+
+
+def peak_rss_mib():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+
+def emit(report: dict, output: str = None):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,85 @@
+"""
+Deterministic synthetic source files for benchmarks.
+Each file repeats a small per-language unit with a few injected errors,
+so analyzers do realistic work at every size.
+"""
+
+SIZES = {"small": 20, "medium": 1_000, "large": 20_000, "huge": 200_000}
+
+UNITS = {
+    "python": (
+        "import os\n"
+        "\n"
+        "def compute_{n}(values):\n"
+        "    total = 0\n"
+        "    for value in values:\n"
+        "        total += value\n"
+        "    print(total)\n"
+        "    return [v * 2 for v in values if v]\n"
+        "\n"
+    ),
+    "javascript": (
+        "function compute_{n}(values) {{\n"
+        "  let total = 0;\n"
+        "  for (const v of values) {{ total += v; }}\n"
+        "  console.log(total);\n"
+        "  return values.map((v) => v * 2);\n"
+        "}}\n"
+    ),
+    "java": (
+        "class Compute{n} {{\n"
+        "  public static void main(String[] args) {{\n"
+        "    int total = 0;\n"
+        "    System.out.println(total);\n"
+        "  }}\n"
+        "}}\n"
+    ),
+    "c": (
+        "#include <stdio.h>\n"
+        "int compute_{n}(int *values, int count) {{\n"
+        "    int total = 0;\n"
+        "    for (int i = 0; i < count; i++) {{\n"
+        "        total += values[i];\n"
+        "    }}\n"
+        "    printf(\"%d\\n\", total);\n"
+        "    return total;\n"
+        "}}\n"
+    ),
+    "cpp": (
+        "#include <iostream>\n"
+        "using namespace std;\n"
+        "int compute_{n}(int value) {{\n"
+        "    int total = value * 2;\n"
+        "    cout << total << endl;\n"
+        "    return total;\n"
+        "}}\n"
+    ),
+}
+
+# Appended once per file so every analyzer has something to report
+ERRORS = {
+    "python": "print(undefined_name)\n",
+    "javascript": "console.log('no semicolons')\n",
+    "java": "class Broken {}\n",
+    "c": "int main() {\n    int x = 1\n",
+    "cpp": "int helper() { return 1; }\n",
+}
+
+
+def generate(language: str, lines: int, with_errors: bool = True, tag: str = "") -> str:
+    """tag is added as a trailing comment, to make otherwise identical files distinct."""
+    unit = UNITS[language]
+    unit_lines = unit.count("\n")
+    parts = [unit.format(n=i) for i in range(max(1, lines // unit_lines))]
+    if with_errors:
+        parts.append(ERRORS[language])
+    if tag:
+        parts.append(("# " if language == "python" else "// ") + tag + "\n")
+    return "".join(parts)
+
+
+def corpus(sizes=SIZES, with_errors: bool = True):
+    """Yields (language, size name, code)."""
+    for language in UNITS:
+        for name, lines in sizes.items():
+            yield language, name, generate(language, lines, with_errors)
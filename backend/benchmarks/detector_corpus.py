@@ -0,0 +1,43 @@
+# -------------------- Language Detector Accuracy Corpus --------------------
+# (expected language, code). Includes cases the old first-match chain got wrong.
+
+SAMPLES = [
+    # ---- Python ----
+    ("python", "def add(a, b):\n    return a + b\n"),
+    ("python", "import os\nprint(os.getcwd())\n"),
+    ("python", "for i in range(10):\n    print(i)\n"),
+    ("python", "def greet():\n    # let the caller decide\n    print('hi')\n"),
+    ("python", "import math\n\ndef area(r):\n    const = 3\n    return math.pi * r * r\n"),
+    ("python", "class Point:\n    def __init__(self, x):\n        self.x = x\n"),
+
+    # ---- JavaScript ----
+    ("javascript", "console.log('hello');\n"),
+    ("javascript", "function add(a, b) {\n  return a + b;\n}\n"),
+    ("javascript", "const double = (x) => x * 2;\n"),
+    ("javascript", "let count = 0;\nvar total = 10;\n"),
+    ("javascript", "import React from 'react';\nconst App = () => null;\n"),
+    ("javascript", "function main() {\n  console.log(print(1));\n}\n"),
+
+    # ---- Java ----
+    ("java", "public class Main {\n  public static void main(String[] a) {\n    System.out.println(1);\n  }\n}\n"),
+    ("java", "import java.util.List;\nclass A {}\n"),
+    ("java", "System.out.println(\"hi\");\n"),
+    ("java", "public class Util {\n  static final int MAX = 3;\n}\n"),
+
+    # ---- C ----
+    ("c", "#include <stdio.h>\nint main() {\n  printf(\"hi\");\n  return 0;\n}\n"),
+    ("c", "#include<stdio.h>\nint main(){return 0;}\n"),
+    ("c", "int main() {\n  int x;\n  scanf(\"%d\", &x);\n}\n"),
+    ("c", "#include <stdio.h>\nconst int N = 3;\nint main() { printf(\"%d\", N); }\n"),
+
+    # ---- C++ ----
+    ("cpp", "#include <iostream>\nint main() {\n  std::cout << 1;\n}\n"),
+    ("cpp", "#include<iostream>\nusing namespace std;\nint main(){ cout << 1; }\n"),
+    ("cpp", "using namespace std;\nint main() { int x; cin >> x; }\n"),
+    ("cpp", "#include <iostream>\n#include <stdio.h>\nint main() { printf(\"x\"); }\n"),
+
+    # ---- Unknown ----
+    ("unknown", ""),
+    ("unknown", "hello world\n"),
+    ("unknown", "SELECT * FROM users;\n"),
+]
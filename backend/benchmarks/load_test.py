@@ -0,0 +1,141 @@
+"""
+End-to-end load test of POST /analyze against a stub Ollama.
+
+The app and the stub both run in this process on ephemeral ports, so
+nothing external is needed. Run from backend/:
+    python -m benchmarks.load_test [--concurrency 16] [--requests 400] [--token-latency 0.01]
+
+By default every request carries distinct code, so each one misses the
+result cache and goes through the LLM dispatcher. --repeat-pool N cycles
+through N payloads instead, to measure the cached path.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import time
+
+import httpx
+
+from benchmarks.common import emit, environment, peak_rss_mib, summarize
+from benchmarks.corpus import SIZES, generate
+from benchmarks.stub_ollama import StubOllama
+
+LANGUAGES = ["python", "c", "cpp", "java", "javascript"]
+
+
+def _payloads(repeat_pool: int):
+    counter = itertools.count()
+    pool = [
+        {"language": LANGUAGES[i % len(LANGUAGES)],
+         "code": generate(LANGUAGES[i % len(LANGUAGES)], SIZES["small"], tag=f"request {i}")}
+        for i in range(repeat_pool)
+    ]
+    while True:
+        i = next(counter)
+        if pool:
+            yield pool[i % len(pool)]
+        else:
+            language = LANGUAGES[i % len(LANGUAGES)]
+            yield {"language": language, "code": generate(language, SIZES["small"], tag=f"request {i}")}
+
+
+async def _serve_app():
+    """Starts main.app under uvicorn on an ephemeral port."""
+    import uvicorn
+    from main import app
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, sock.getsockname()[1]
+
+
+async def run(concurrency: int, total: int, repeat_pool: int, tokens: int, token_latency: float):
+    stub = StubOllama(tokens=tokens, token_latency=token_latency, first_token_latency=token_latency)
+    stub_port = await stub.start()
+    # Must be set before main is imported; .env does not override it
+    os.environ["OLLAMA_URL"] = f"http://127.0.0.1:{stub_port}"
+    # Memory tier only, so runs do not see results left over on disk
+    os.environ.setdefault("CACHE_DB_PATH", "")
+
+    server, server_task, port = await _serve_app()
+    from llm.dispatcher import FIX_UNAVAILABLE_HINT, current_stats
+
+    payloads = _payloads(repeat_pool)
+    latencies, errors, shed = [], 0, 0
+
+    async def client_loop(client, remaining):
+        nonlocal errors, shed
+        while next(remaining, None) is not None:
+            payload = next(payloads)
+            start = time.perf_counter()
+            try:
+                response = await client.post("/analyze", json=payload)
+                response.raise_for_status()
+                if response.json().get("hint") == FIX_UNAVAILABLE_HINT:
+                    shed += 1
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=120
+        ) as client:
+            remaining = iter(range(total))
+            start = time.perf_counter()
+            await asyncio.gather(*(client_loop(client, remaining) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+            cache = (await client.get("/cache/stats")).json()
+    finally:
+        server.should_exit = True
+        await server_task
+        await stub.stop()
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "repeat_pool": repeat_pool,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize(latencies),
+        "errors": errors,
+        "fix_unavailable": shed,
+        "stub_generations": stub.requests,
+        "cache": cache,
+        "llm": current_stats(),
+        # Includes the load generator, which shares this process
+        "peak_rss_mib": peak_rss_mib(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--repeat-pool", type=int, default=0, help="cycle through N payloads (0 = all distinct)")
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "load_test",
+        "environment": environment(),
+        "config": {"tokens": args.tokens, "token_latency": args.token_latency},
+        "result": asyncio.run(
+            run(args.concurrency, args.requests, args.repeat_pool, args.tokens, args.token_latency)
+        ),
+    }
+    emit(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Runs every benchmark and writes one JSON report.
+With --compare, exits non-zero if any metric regressed past --tolerance.
+
+Run from backend/:
+    python -m benchmarks.run_all --output baseline.json
+    python -m benchmarks.run_all --compare baseline.json --tolerance 0.25
+
+Timings are only comparable between runs on the same machine.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from benchmarks import bench_analyzers, bench_language_detector, bench_startup, load_test
+from benchmarks.common import emit, environment
+
+# Metric name -> True if higher is better
+GATED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "microseconds": False,
+    "peak_alloc_kib": False,
+    "throughput_rps": True,
+    "accuracy": True,
+    "prompt_tokens": False,
+    "import_p50_ms": False,
+}
+
+# Timings below these are mostly scheduler noise and are not gated
+NOISE_FLOOR = {"p50_ms": 0.05, "p95_ms": 0.05, "microseconds": 50, "import_p50_ms": 20}
+
+# Fields that identify an entry within a list of results
+IDENTITY_FIELDS = ("language", "size", "chars")
+
+
+def run(quick: bool):
+    detector_sizes = bench_language_detector.SIZES[:3] if quick else bench_language_detector.SIZES
+    sizes = ["small", "medium"] if quick else ["small", "medium", "large"]
+    requests = 100 if quick else 400
+    return {
+        "benchmark": "all",
+        "environment": environment(),
+        "quick": quick,
+        "language_detector": bench_language_detector.run(detector_sizes),
+        "analyzers": bench_analyzers.run(sizes),
+        "load_test": asyncio.run(load_test.run(16, requests, 0, 20, 0.01)),
+        "startup": bench_startup.run(3 if quick else 5),
+    }
+
+
+# -------------------- Comparison --------------------
+
+def flatten(node, path="", out=None):
+    """Maps "a.b[language=c,size=small].p95_ms" style paths to gated metric values."""
+    out = {} if out is None else out
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in GATED_METRICS and isinstance(value, (int, float)):
+                out[f"{path}.{key}"] = value
+            else:
+                flatten(value, f"{path}.{key}" if path else key, out)
+    elif isinstance(node, list):
+        for item in node:
+            if isinstance(item, dict):
+                identity = ",".join(f"{f}={item[f]}" for f in IDENTITY_FIELDS if f in item)
+                flatten(item, f"{path}[{identity}]", out)
+    return out
+
+
+def compare(baseline: dict, current: dict, tolerance: float):
+    """Returns the metrics that got worse than baseline by more than tolerance."""
+    before, after = flatten(baseline), flatten(current)
+    regressions = []
+    for path, old in before.items():
+        new = after.get(path)
+        name = path.rsplit(".", 1)[1]
+        if new is None or old == 0 or max(old, new) < NOISE_FLOOR.get(name, 0):
+            continue
+        higher_is_better = GATED_METRICS[name]
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append({"metric": path, "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer requests")
+    parser.add_argument("--output")
+    parser.add_argument("--compare", metavar="BASELINE", help="report from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    report = run(args.quick)
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(json.load(f), report, args.tolerance)
+    emit(report, args.output)
+
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['metric']}: {r['baseline']} -> {r['current']} ({r['change']:+.0%})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Minimal stand-in for Ollama's /api/generate, for offline benchmarks.
+Streams NDJSON tokens with configurable latency.
+
+Standalone:
+    python -m benchmarks.stub_ollama --port 11434 --tokens 40 --token-latency 0.02
+"""
+import argparse
+import asyncio
+import json
+
+
+class StubOllama:
+    def __init__(self, tokens: int = 40, token_latency: float = 0.02, first_token_latency: float = 0.1):
+        self.tokens = tokens
+        self.token_latency = token_latency
+        self.first_token_latency = first_token_latency
+        self.requests = 0
+        self.server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            # Keep-alive: serve requests until the client hangs up
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                self.requests += 1
+
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/x-ndjson\r\n"
+                    b"Transfer-Encoding: chunked\r\n\r\n"
+                )
+                await asyncio.sleep(self.first_token_latency)
+                for i in range(self.tokens):
+                    if i:
+                        await asyncio.sleep(self.token_latency)
+                    self._chunk(writer, {"response": f"token{i} ", "done": False})
+                    await writer.drain()
+                self._chunk(writer, {"response": "", "done": True})
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _chunk(writer, payload: dict):
+        data = (json.dumps(payload) + "\n").encode()
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+async def _serve(args):
+    stub = StubOllama(args.tokens, args.token_latency, args.first_token_latency)
+    port = await stub.start(args.host, args.port)
+    print(f"Stub Ollama listening on {args.host}:{port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--first-token-latency", type=float, default=0.1)
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# -------------------- Cache Keys --------------------
+
+def normalize_code(code: str) -> str:
+    """
+    Unifies line endings, the one difference that never changes an analysis.
+    Trailing whitespace can (a backslash continuation followed by a space
+    is a syntax error), so it is kept.
+    """
+    return code.replace("\r\n", "\n").replace("\r", "\n")
+
+
+# Bumped when key derivation changes, so entries stored under the old
+# rules (which may belong to different code) are never served
+KEY_FORMAT = 2
+
+
+def cache_key(language: str, code: str, analyzer_version, model: str, prompt_template: str) -> str:
+    payload = json.dumps(
+        [KEY_FORMAT, language, normalize_code(code), str(analyzer_version), model, prompt_template or ""],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# -------------------- Result Cache --------------------
+
+class ResultCache:
+    """
+    Two-tier cache for analysis results.
+    Memory tier: LRU bounded by max_entries.
+    Disk tier (optional): SQLite file that survives restarts.
+    Both tiers expire entries after ttl_seconds.
+
+    Several server processes can share one disk tier; each keeps its own
+    memory tier in front of it. If the file stays locked past the busy
+    timeout, lookups count as misses and writes are skipped. Async code
+    should use get_async / set_async, which touch the disk tier in a
+    thread so lock waits never block the event loop.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=86400, db_path=None, disk_max_entries=100000,
+                 busy_timeout=0.5):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_max_entries = disk_max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()    # one connection, used from worker threads
+        self._disk_writes = 0
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created_at)")
+            self._db.commit()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    # ---- tiers ----
+
+    def _memory_get(self, key: str):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at):
+                    self._memory.move_to_end(key)
+                    self.counters["hits"] += 1
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+            return None
+
+    def _disk_get(self, key: str):
+        with self._db_lock:
+            try:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                row = None
+        if row and not self._expired(row[1]):
+            value = json.loads(row[0])
+            with self._lock:
+                self._remember(key, value, row[1])
+                self.counters["hits"] += 1
+                self.counters["disk_hits"] += 1
+            return value
+        return None
+
+    def _miss(self):
+        with self._lock:
+            self.counters["misses"] += 1
+
+    def _memory_set(self, key: str, value, created_at: float):
+        with self._lock:
+            self._remember(key, value, created_at)
+
+    def _disk_set(self, key: str, value, created_at: float):
+        with self._db_lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), created_at),
+                )
+                self._disk_writes += 1
+                # Prune periodically rather than on every write
+                if self._disk_writes % 100 == 0:
+                    self._prune_disk()
+                self._db.commit()
+            except sqlite3.OperationalError:
+                self._db.rollback()
+
+    # ---- lookups ----
+
+    def get(self, key: str):
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = self._disk_get(key)
+        if value is None:
+            self._miss()
+        return value
+
+    async def get_async(self, key: str):
+        value = self._memory_get(key)
+        if value is None and self._db is not None:
+            value = await asyncio.to_thread(self._disk_get, key)
+        if value is None:
+            self._miss()
+        return value
+
+    def set(self, key: str, value):
+        created_at = time.time()
+        self._memory_set(key, value, created_at)
+        if self._db is not None:
+            self._disk_set(key, value, created_at)
+
+    async def set_async(self, key: str, value):
+        created_at = time.time()
+        self._memory_set(key, value, created_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, created_at)
+
+    def _prune_disk(self):
+        if self.ttl_seconds > 0:
+            self._db.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        self._db.execute(
+            "DELETE FROM results WHERE key IN ("
+            "SELECT key FROM results ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._db is not None,
+            }
+
+
+# -------------------- Shared Instance --------------------
+
+_cache = None
+
+
+def get_cache() -> ResultCache:
+    """
+    Returns the process-wide result cache, configured from CACHE_* env vars.
+    Set CACHE_DB_PATH to enable the on-disk tier.
+    """
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("CACHE_TTL_SECONDS", "86400")),
+            db_path=os.getenv("CACHE_DB_PATH") or None,
+            disk_max_entries=int(os.getenv("CACHE_DISK_MAX_ENTRIES", "100000")),
+            busy_timeout=float(os.getenv("CACHE_DB_BUSY_TIMEOUT", "0.5")),
+        )
+    return _cache
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from analyzers import registry
+
+
+class DocumentNotFound(LookupError):
+    """Raised when edits arrive for a document the server does not hold."""
+
+
+class VersionConflict(ValueError):
+    """Raised when edits do not apply to the server's copy of a document."""
+
+
+# -------------------- Documents --------------------
+
+_UNSCANNED = object()
+
+
+class Document:
+    """
+    Server-side copy of an editor buffer.
+
+    Analyzers that expose scan_line / errors_from_line_facts are re-run
+    only on edited lines (plus any following lines whose incoming lexer
+    state changed). Other analyzers re-run on the whole text, and only
+    when it actually changed.
+    """
+
+    def __init__(self, language: str, text: str, version: int):
+        self.language = language
+        self.version = version
+        self.lines = _normalize(text).split("\n")
+        self.static_check, self.analyzer = registry.load(language)
+        self.incremental = registry.get_spec(language).supports("incremental")
+        self.facts = [None] * len(self.lines)
+        self.states = [_UNSCANNED] * len(self.lines)   # lexer state at the start of each line
+        self.last_used = time.monotonic()
+        self._result = None
+
+        if self.incremental:
+            self.states[0] = None
+            self._rescan(0, len(self.lines))
+
+    # ---- edits ----
+
+    def apply(self, edits: list, version: int):
+        """
+        Applies edits in order. Positions are 1-based (Monaco style);
+        end_column is exclusive. Each change must carry the next version:
+        a skipped one means edits were lost and the copies have diverged.
+        """
+        if version != self.version + 1:
+            raise VersionConflict(f"Expected version {self.version + 1}, got {version}")
+
+        for edit in edits:
+            self._apply_one(edit)
+        self.version = version
+        self.last_used = time.monotonic()
+
+    def _apply_one(self, edit: dict):
+        start_line, end_line = edit["start_line"], edit["end_line"]
+        if not (1 <= start_line <= end_line <= len(self.lines)):
+            raise VersionConflict("Edit range is outside the document")
+        start_column, end_column = edit["start_column"], edit["end_column"]
+        if not (1 <= start_column <= len(self.lines[start_line - 1]) + 1
+                and 1 <= end_column <= len(self.lines[end_line - 1]) + 1
+                and (start_line < end_line or start_column <= end_column)):
+            raise VersionConflict("Edit columns are outside the line")
+
+        prefix = self.lines[start_line - 1][:start_column - 1]
+        suffix = self.lines[end_line - 1][end_column - 1:]
+        replacement = (prefix + _normalize(edit["text"]) + suffix).split("\n")
+
+        first, removed = start_line - 1, end_line - start_line + 1
+        self.lines[first:first + removed] = replacement
+        self._result = None
+
+        if self.incremental:
+            self.facts[first:first + removed] = [None] * len(replacement)
+            self.states[first + 1:first + removed] = [_UNSCANNED] * (len(replacement) - 1)
+            self._rescan(first, first + len(replacement))
+
+    def _rescan(self, start: int, end: int):
+        """
+        Scans lines [start, end) and keeps going while the state handed to
+        the next line differs from what that line was last scanned with.
+        """
+        scan = self.analyzer.scan_line
+        state = self.states[start]
+        i = start
+        while i < len(self.lines):
+            self.facts[i], state = scan(self.lines[i], state)
+            i += 1
+            if i < len(self.lines):
+                if i >= end and self.states[i] == state:
+                    break
+                self.states[i] = state
+
+    # ---- results ----
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def result(self):
+        if self._result is None:
+            if self.incremental:
+                errors = self.analyzer.errors_from_line_facts(self.facts)
+            else:
+                errors = self.static_check(self.text())
+            # Static findings only; fixes come from /analyze
+            self._result = {**self.analyzer.build_result("", errors), "solution": ""}
+        self.last_used = time.monotonic()
+        return {**self._result, "version": self.version}
+
+
+def _normalize(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+# -------------------- Store --------------------
+
+class DocumentStore:
+    """
+    In-memory documents, evicted least-recently-used first and after idling.
+    Each server process has its own; clients reopen on a 404.
+    """
+
+    def __init__(self, max_documents=1000, idle_seconds=3600):
+        self.max_documents = max_documents
+        self.idle_seconds = idle_seconds
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def open(self, doc_id: str, language: str, text: str, version: int = 0):
+        if not registry.is_supported(language):
+            raise ValueError(f"Unsupported language: {language}")
+        document = Document(language, text, version)
+        with self._lock:
+            self._documents[doc_id] = document
+            self._documents.move_to_end(doc_id)
+            self._evict()
+        return document.result()
+
+    def change(self, doc_id: str, edits: list, version: int):
+        with self._lock:
+            document = self._documents.get(doc_id)
+            if document is None:
+                raise DocumentNotFound(doc_id)
+            self._documents.move_to_end(doc_id)
+            try:
+                document.apply(edits, version)
+            except VersionConflict:
+                # Edits may be half-applied; make the client resend the full text
+                del self._documents[doc_id]
+                raise
+            return document.result()
+
+    def close(self, doc_id: str):
+        with self._lock:
+            self._documents.pop(doc_id, None)
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._documents:
+            oldest_id, oldest = next(iter(self._documents.items()))
+            if len(self._documents) > self.max_documents or now - oldest.last_used > self.idle_seconds:
+                del self._documents[oldest_id]
+            else:
+                break
+
+
+_store = None
+
+
+def get_store() -> DocumentStore:
+    global _store
+    if _store is None:
+        _store = DocumentStore(
+            max_documents=int(os.getenv("DOCUMENTS_MAX", "1000")),
+            idle_seconds=float(os.getenv("DOCUMENTS_IDLE_SECONDS", "3600")),
+        )
+    return _store
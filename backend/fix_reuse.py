@@ -0,0 +1,356 @@
+import builtins
+import difflib
+import io
+import keyword
+import os
+import random
+import re
+import threading
+import tokenize
+import zlib
+from collections import OrderedDict
+
+from analyzers import c_family, registry
+
+# -------------------- Canonical Tokens --------------------
+# Code is reduced to its token stream with comments dropped and every
+# user-chosen identifier replaced by its order of first appearance, so
+# copies of the same exercise with renamed variables look identical.
+
+_PYTHON_KEEP = set(keyword.kwlist) | set(keyword.softkwlist) | set(dir(builtins)) | {"self", "cls"}
+
+# Names after these are attributes or qualified names, not variables
+_MEMBER_ACCESS = {".", "->", "::"}
+
+_PYTHON_FALLBACK = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<string>[rRbBuUfF]{0,2}(?:'''|\"\"\"|'[^'\n]*'?|"[^"\n]*"?))
+  | (?P<ident>[^\W\d]\w*)
+  | (?P<other>\S)
+""", re.VERBOSE)
+
+
+def _python_tokens(code: str):
+    """(kind, text, line index, column) tuples; kind is "ident" or "other"."""
+    tokens = []
+    resume_line = None
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            row, column = token.start
+            if token.type == tokenize.NAME:
+                tokens.append(("ident", token.string, row - 1, column))
+            elif token.type in (tokenize.OP, tokenize.NUMBER, tokenize.STRING):
+                tokens.append(("other", token.string, row - 1, column))
+            elif token.type in (tokenize.INDENT, tokenize.DEDENT, tokenize.NEWLINE):
+                tokens.append(("other", tokenize.tok_name[token.type], row - 1, column))
+    except IndentationError as e:
+        resume_line = e.lineno
+    except tokenize.TokenError:
+        pass  # unclosed bracket at end of input; everything was read
+
+    if resume_line:
+        # Broken indentation stops the tokenizer; lex the rest loosely
+        tokens = [t for t in tokens if t[2] < resume_line - 1]
+        for index, line in enumerate(code.splitlines()[resume_line - 1:], resume_line - 1):
+            for match in _PYTHON_FALLBACK.finditer(line):
+                if match.lastgroup != "comment":
+                    kind = "ident" if match.lastgroup == "ident" else "other"
+                    tokens.append((kind, match.group(), index, match.start()))
+    return tokens
+
+
+def _c_family_tokens(code: str, keep: set):
+    tokens = []
+    for index, line_tokens in enumerate(c_family.scan_lines(code.splitlines())):
+        for kind, text, column in line_tokens:
+            if kind in ("comment_start", "comment_end"):
+                continue
+            kind = "ident" if kind == "ident" and text not in keep else "other"
+            tokens.append((kind, text, index, column - 1))
+    return tokens
+
+
+def _tokens(language: str, code: str):
+    if language == "python":
+        return [
+            ("other", *rest) if kind == "ident" and rest[0] in _PYTHON_KEEP else (kind, *rest)
+            for kind, *rest in _python_tokens(code)
+        ]
+    _, module = registry.load(language)
+    keep = c_family.KEYWORDS | c_family.VALUE_KEYWORDS | set(getattr(module, "HEADERS", ())) | {"std"}
+    return _c_family_tokens(code, keep)
+
+
+def _renamed(tokens: list):
+    """Identifier tokens that stand for a variable (not after . -> ::)."""
+    previous = None
+    for token in tokens:
+        if token[0] == "ident" and previous not in _MEMBER_ACCESS:
+            yield token
+        previous = token[1]
+
+
+# Languages whose code can be canonicalized
+TOKENIZED_LANGUAGES = {"python", "c", "cpp"}
+
+
+def canonicalize(language: str, code: str):
+    """
+    Returns (canonical tokens, names): tokens with identifiers replaced by
+    placeholders, and the original names in placeholder order.
+    """
+    tokens = _tokens(language, code)
+    names = {}
+    for token in _renamed(tokens):
+        names.setdefault(token[1], len(names))
+    canonical = [
+        _placeholder(names[text]) if kind == "ident" and text in names else text
+        for kind, text, _, _ in tokens
+    ]
+    # A name used both as a variable and after "." keeps its text in the member position
+    for i, (kind, text, _, _) in enumerate(tokens):
+        if kind == "ident" and i and tokens[i - 1][1] in _MEMBER_ACCESS:
+            canonical[i] = text
+    return canonical, list(names)
+
+
+def _placeholder(index: int) -> str:
+    return f"\x00{index}\x00"
+
+
+_PLACEHOLDER = re.compile(r"\x00(\d+)\x00")
+
+
+def _encode(language: str, text: str, names: list) -> str:
+    """
+    Replaces the identifier tokens among names with their placeholders.
+    Strings, comments and member names are left as they are.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    lines = text.split("\n")
+    # Right to left within each line, so earlier columns stay valid
+    for _, name, line, column in sorted(_renamed(_tokens(language, text)), key=lambda t: (t[2], -t[3])):
+        if name in index and line < len(lines) and lines[line][column:column + len(name)] == name:
+            lines[line] = lines[line][:column] + _placeholder(index[name]) + lines[line][column + len(name):]
+    return "\n".join(lines)
+
+
+def _encode_message(text: str, names: list) -> str:
+    """Replaces whole-word occurrences of names in an error message."""
+    if not names:
+        return text
+    index = {name: i for i, name in enumerate(names)}
+    pattern = re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, sorted(names, key=len, reverse=True))))
+    return pattern.sub(lambda m: _placeholder(index[m.group()]), text)
+
+
+def _decode(text: str, names: list):
+    """Inverse of _encode with another program's names; None if they do not cover it."""
+    missing = False
+
+    def name(match):
+        nonlocal missing
+        i = int(match.group(1))
+        if i >= len(names):
+            missing = True
+            return ""
+        return names[i]
+
+    decoded = _PLACEHOLDER.sub(name, text)
+    return None if missing else decoded
+
+
+# -------------------- Applying a Fix --------------------
+
+def apply_diff(original: str, fixed: str, target: str):
+    """
+    Re-applies the line changes that turned original into fixed onto
+    target. Every changed line must also be in target, with the same text.
+    Lines only target has are kept as they are. Returns None when a change
+    cannot be placed.
+    """
+    before, after, lines = original.split("\n"), fixed.split("\n"), target.split("\n")
+
+    shared = {}     # line in original -> same line in target
+    for a, b, size in difflib.SequenceMatcher(None, before, lines, autojunk=False).get_matching_blocks():
+        for k in range(size):
+            shared[a + k] = b + k
+
+    edits = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, before, after, autojunk=False).get_opcodes():
+        if tag == "equal":
+            continue
+        if i1 == i2:
+            # Insertion: anchor to the line before, else the line after
+            if i1 == 0:
+                start = 0
+            elif i1 - 1 in shared:
+                start = shared[i1 - 1] + 1
+            elif i1 in shared:
+                start = shared[i1]
+            else:
+                return None
+            end = start
+        else:
+            placed = [shared.get(i) for i in range(i1, i2)]
+            if None in placed or placed != list(range(placed[0], placed[0] + len(placed))):
+                return None
+            start, end = placed[0], placed[-1] + 1
+        edits.append((start, end, after[j1:j2]))
+
+    for start, end, replacement in reversed(edits):
+        lines[start:end] = replacement
+    return "\n".join(lines)
+
+
+# -------------------- MinHash --------------------
+
+SHINGLE_TOKENS = 5
+BANDS = 16
+ROWS = 4            # BANDS * ROWS hash functions per signature
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_HASHES = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+
+
+def minhash(tokens: list):
+    # crc32, not hash(): string hashes are salted per process, and signatures
+    # must agree across workers and restarts
+    shingles = {
+        zlib.crc32("\x1f".join(tokens[i:i + SHINGLE_TOKENS]).encode("utf-8", "surrogatepass"))
+        for i in range(max(1, len(tokens) - SHINGLE_TOKENS + 1))
+    }
+    return tuple(min((a * s + b) % _PRIME for s in shingles) for a, b in _HASHES)
+
+
+def similarity(a: tuple, b: tuple) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+# -------------------- Fix Index --------------------
+
+class FixIndex:
+    """
+    Past LLM fixes, found again by code similarity.
+
+    A stored fix is reused only for the same language, the same static
+    errors (compared with identifiers canonicalized) and an estimated
+    similarity of at least `threshold`. The lines the fix changed are
+    renamed to the new code's identifiers and applied to its own source,
+    so lines that differ (strings, comments, extra statements) are kept.
+    Candidates come from LSH buckets, so a lookup never scans the whole
+    index.
+    """
+
+    def __init__(self, threshold=0.9, max_entries=5000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()      # id -> (language, signature, error key, code, fix), names encoded
+        self._buckets = {}                 # (band, hashes) -> ids
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.counters = {"lookups": 0, "reused": 0, "stored": 0, "evictions": 0}
+
+    @staticmethod
+    def _error_key(errors: list, names: list):
+        return tuple(sorted(
+            (error.get("code", ""), _encode_message(error.get("message", ""), names))
+            for error in errors if error.get("severity", "ERROR") == "ERROR"
+        ))
+
+    @staticmethod
+    def _bands(signature: tuple):
+        return [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+    def lookup(self, language: str, code: str, errors: list):
+        """Returns a reusable fix for code, or None."""
+        if language not in TOKENIZED_LANGUAGES:
+            return None
+        tokens, names = canonicalize(language, code)
+        signature = minhash(tokens)
+        error_key = self._error_key(errors, names)
+
+        with self._lock:
+            self.counters["lookups"] += 1
+            candidates = set()
+            for band in self._bands(signature):
+                candidates.update(self._buckets.get(band, ()))
+
+            matches = []
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry[0] != language or entry[2] != error_key:
+                    continue
+                score = similarity(signature, entry[1])
+                if score >= self.threshold:
+                    matches.append((score, entry_id))
+            matches.sort(reverse=True)
+            entries = [(entry_id, self._entries[entry_id]) for _, entry_id in matches]
+
+        # Most similar first; the first whose changes fit this code wins
+        for entry_id, (_, _, _, original, fix) in entries:
+            original, fix = _decode(original, names), _decode(fix, names)
+            if original is None or fix is None:
+                continue
+            fixed = apply_diff(original, fix, code)
+            if fixed is None:
+                continue
+            with self._lock:
+                if entry_id in self._entries:
+                    self._entries.move_to_end(entry_id)
+                self.counters["reused"] += 1
+            return fixed
+        return None
+
+    def remember(self, language: str, code: str, errors: list, fix: str):
+        if language not in TOKENIZED_LANGUAGES or not fix.strip():
+            return
+        tokens, names = canonicalize(language, code)
+        signature = minhash(tokens)
+        entry = (
+            language, signature, self._error_key(errors, names),
+            _encode(language, code, names), _encode(language, fix, names),
+        )
+
+        with self._lock:
+            self._ids += 1
+            self._entries[self._ids] = entry
+            for band in self._bands(signature):
+                self._buckets.setdefault(band, []).append(self._ids)
+            self.counters["stored"] += 1
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        entry_id, (_, signature, *_) = self._entries.popitem(last=False)
+        for band in self._bands(signature):
+            bucket = self._buckets[band]
+            bucket.remove(entry_id)
+            if not bucket:
+                del self._buckets[band]
+        self.counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries), "threshold": self.threshold}
+
+
+# -------------------- Shared Instance --------------------
+
+_index = None
+
+
+def get_fix_index():
+    """
+    Returns the process-wide fix index, or None unless FIX_REUSE=1.
+    Tuned by FIX_REUSE_THRESHOLD and FIX_REUSE_MAX_ENTRIES.
+    """
+    global _index
+    if _index is None and os.getenv("FIX_REUSE", "0") == "1":
+        _index = FixIndex(
+            threshold=float(os.getenv("FIX_REUSE_THRESHOLD", "0.9")),
+            max_entries=int(os.getenv("FIX_REUSE_MAX_ENTRIES", "5000")),
+        )
+    return _index
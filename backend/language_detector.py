@@ -1,50 +1,65 @@
+import re
+
+from analyzers import registry
+
+# Only the head of very large inputs is scanned; includes, imports and
+# the first few definitions are what identify a language.
+SAMPLE_CHARS = 32 * 1024
+
+# Signatures and the tie-break order (most specific language first) come
+# from the analyzer registry. Patterns that can match at the same position
+# must be listed most specific first: alternation picks the first branch
+# that matches, e.g. Java's "import java." before Python's "import".
+
+# One alternation over every signature: the text is scanned once,
+# case-insensitively, without making a lowercased copy. The leading
+# lookahead rejects positions no signature can start at before any
+# branch is tried, which is most of them.
+_compiled = None
+
+
+def _signature_re():
+    """Returns (signatures, priority order, compiled alternation), built on first use."""
+    global _compiled
+    if _compiled is None:
+        signatures = registry.signatures()
+        first_chars = "".join(sorted({re.sub(r"^\\b", "", p)[0].lower() for _, p, _ in signatures}))
+        alternation = re.compile(
+            f"(?=[{re.escape(first_chars)}])(?:"
+            + "|".join(f"(?P<s{i}>{pattern})" for i, (_, pattern, _) in enumerate(signatures))
+            + ")",
+            re.IGNORECASE,
+        )
+        _compiled = (signatures, registry.priority_order(), alternation)
+    return _compiled
+
+
+def score_languages(code: str):
+    """
+    Returns candidate languages, best first, as
+    [{"language": ..., "score": ..., "confidence": ...}].
+    Each signature counts once however often it occurs.
+    """
+    signatures, priority, signature_re = _signature_re()
+    seen = set()
+    for match in signature_re.finditer(code, 0, SAMPLE_CHARS):
+        seen.add(match.lastgroup)
+        if len(seen) == len(signatures):
+            break
+
+    scores = {}
+    for group in seen:
+        language, _, weight = signatures[int(group[1:])]
+        scores[language] = scores.get(language, 0) + weight
+
+    total = sum(scores.values())
+    ranked = sorted(scores, key=lambda lang: (-scores[lang], priority.index(lang)))
+    return [
+        {"language": lang, "score": scores[lang], "confidence": round(scores[lang] / total, 3)}
+        for lang in ranked
+    ]
+
+
 def detect_language(code: str):
-    code_lower = code.lower()
-
-    # ---- C++ ----
-    if (
-        "#include<iostream>" in code_lower
-        or "#include <iostream>" in code_lower
-        or "using namespace std" in code_lower
-        or "cout <<" in code_lower
-        or "cin >>" in code_lower
-    ):
-        return "cpp"
-
-    # ---- Java ----
-    if (
-        "public class" in code_lower
-        or "system.out.println" in code_lower
-        or "import java." in code_lower
-    ):
-        return "java"
-
-    # ---- C ----
-    if (
-        "#include<stdio.h>" in code_lower
-        or "#include <stdio.h>" in code_lower
-        or "printf(" in code_lower
-        or "scanf(" in code_lower
-    ):
-        return "c"
-
-    # ---- JavaScript ----
-    if (
-        "console.log(" in code_lower
-        or "function " in code_lower
-        or "=>" in code_lower
-        or "let " in code_lower
-        or "const " in code_lower
-        or "var " in code_lower
-    ):
-        return "javascript"
-
-    # ---- Python (LAST) ----
-    if (
-        "def " in code_lower
-        or "import " in code_lower
-        or ("print(" in code_lower and "console.log" not in code_lower)
-    ):
-        return "python"
-
-    return "unknown"
+    candidates = score_languages(code)
+    return candidates[0]["language"] if candidates else "unknown"
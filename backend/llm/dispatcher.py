@@ -0,0 +1,337 @@
+import asyncio
+import itertools
+import os
+import time
+
+import httpx
+
+from llm.ollama_client import default_model, stream_generate
+
+# -------------------- Priorities --------------------
+
+INTERACTIVE = 0     # a user is waiting on /analyze
+BATCH = 1           # bulk work; runs when nothing interactive is queued
+
+FIX_UNAVAILABLE_HINT = (
+    "AI fix unavailable right now (the model server is busy or unreachable). "
+    "Static results only; please try again shortly."
+)
+
+
+class LLMUnavailable(Exception):
+    """Raised when a generation cannot be served: queue full or upstream error."""
+
+
+class QueueFull(LLMUnavailable):
+    """Raised when the dispatch queue is at capacity (load shedding)."""
+
+
+def fix_unavailable(result: dict):
+    return {**result, "hint": FIX_UNAVAILABLE_HINT, "solution": ""}
+
+
+# -------------------- Shared Slots --------------------
+
+# How often a worker retries when every shared slot is taken
+SLOT_POLL_SECONDS = 0.05
+
+
+class SlotFiles:
+    """
+    Generation slots shared by every server process on the host, held as
+    flock()ed files in one directory. A process that dies releases its
+    slots with it. Unix only.
+    """
+
+    def __init__(self, directory: str, count: int):
+        import fcntl
+
+        self._fcntl = fcntl
+        os.makedirs(directory, exist_ok=True)
+        self._files = [open(os.path.join(directory, f"slot-{i}"), "a") for i in range(count)]
+        self._held = set()
+        self.count = count
+
+    def try_acquire(self):
+        """Returns a slot index, or None if all are taken."""
+        for index, file in enumerate(self._files):
+            # flock() on a descriptor this process already locked would succeed
+            if index in self._held:
+                continue
+            try:
+                self._fcntl.flock(file, self._fcntl.LOCK_EX | self._fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            self._held.add(index)
+            return index
+        return None
+
+    def release(self, index: int):
+        self._fcntl.flock(self._files[index], self._fcntl.LOCK_UN)
+        self._held.discard(index)
+
+
+# -------------------- Jobs --------------------
+
+class Job:
+    """
+    One generation, shared by every caller that asked for the same prompt.
+    Tokens are kept so late subscribers can replay them.
+    """
+
+    def __init__(self, key, prompt: str, model: str, priority: int):
+        self.key = key
+        self.prompt = prompt
+        self.model = model
+        self.priority = priority
+        self.chunks = []
+        self.error = None
+        self.done = False
+        self.started = False
+        self.task = None
+        self.subscribers = 0
+        self.enqueued_at = time.monotonic()
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+# -------------------- Dispatcher --------------------
+
+class LLMDispatcher:
+    """
+    Bounded front door to the model server.
+    - at most `workers` generations run at once
+    - identical in-flight prompts share one generation
+    - interactive jobs are started before batch jobs
+    - submissions beyond `max_queue` waiting jobs raise QueueFull
+    - with `slots`, a job also needs one of the host-wide SlotFiles
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 32, slots: SlotFiles = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.slots = slots
+        self._queue = asyncio.PriorityQueue()
+        self._inflight = {}
+        self._sequence = itertools.count()
+        self._worker_tasks = []
+        self.queued = 0
+        self.running = 0
+        self.counters = {
+            "submitted": 0, "coalesced": 0, "shed": 0, "started": 0,
+            "completed": 0, "failed": 0, "cancelled": 0,
+        }
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    # ---- submission ----
+
+    def _submit(self, prompt: str, model: str, priority: int) -> Job:
+        self._ensure_workers()
+        key = (model, prompt)
+        job = self._inflight.get(key)
+
+        if job is not None:
+            self.counters["coalesced"] += 1
+            if priority < job.priority and not job.started:
+                # Re-queue at the higher priority; the stale entry is skipped
+                job.priority = priority
+                self._queue.put_nowait((priority, next(self._sequence), job))
+            return job
+
+        if self.queued >= self.max_queue:
+            self.counters["shed"] += 1
+            raise QueueFull(f"LLM queue is full ({self.max_queue} waiting)")
+
+        job = Job(key, prompt, model, priority)
+        self._inflight[key] = job
+        self.queued += 1
+        self.counters["submitted"] += 1
+        self._queue.put_nowait((priority, next(self._sequence), job))
+        return job
+
+    async def stream(self, prompt: str, model: str = None, priority: int = INTERACTIVE):
+        """
+        Yields tokens for prompt. Raises LLMUnavailable if the job is shed
+        or fails. The generation is cancelled once no caller is listening.
+        """
+        job = self._submit(prompt, model or default_model(), priority)
+        job.subscribers += 1
+        index = 0
+        try:
+            while True:
+                changed = job._changed
+                while index < len(job.chunks):
+                    yield job.chunks[index]
+                    index += 1
+                if job.done:
+                    if job.error is not None:
+                        raise job.error
+                    return
+                await changed.wait()
+        finally:
+            job.subscribers -= 1
+            if job.subscribers == 0 and not job.done:
+                self._abandon(job)
+
+    async def generate(self, prompt: str, model: str = None, priority: int = INTERACTIVE) -> str:
+        parts = []
+        async for token in self.stream(prompt, model, priority):
+            parts.append(token)
+        return "".join(parts)
+
+    def _abandon(self, job: Job):
+        self.counters["cancelled"] += 1
+        if job.started:
+            job.task.cancel()
+        else:
+            self.queued -= 1
+            self._finish(job, None)
+
+    # ---- workers ----
+
+    def _ensure_workers(self):
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            job = item[2]
+            if job.started or job.done:
+                continue  # re-prioritised duplicate or abandoned job
+
+            slot = None
+            if self.slots is not None:
+                slot = self.slots.try_acquire()
+                if slot is None:
+                    # Other processes hold every slot; requeue so a more urgent job can overtake
+                    self._queue.put_nowait(item)
+                    await asyncio.sleep(SLOT_POLL_SECONDS)
+                    continue
+
+            job.started = True
+            self.counters["started"] += 1
+            self.queued -= 1
+            self.running += 1
+            wait = time.monotonic() - job.enqueued_at
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+            job.task = asyncio.create_task(self._run(job))
+            try:
+                await asyncio.wait({job.task})
+            finally:
+                self.running -= 1
+                if slot is not None:
+                    self.slots.release(slot)
+
+    async def _run(self, job: Job):
+        try:
+            async for token in stream_generate(job.prompt, job.model):
+                job.chunks.append(token)
+                job.notify()
+        except asyncio.CancelledError:
+            self._finish(job, LLMUnavailable("Generation cancelled"))
+            raise
+        except httpx.HTTPError as e:
+            self.counters["failed"] += 1
+            self._finish(job, LLMUnavailable(f"Model server error: {e}"))
+        except Exception as e:
+            # Anything else (e.g. a malformed stream) must still end the job,
+            # or its subscribers and later coalesced callers wait forever
+            self.counters["failed"] += 1
+            self._finish(job, LLMUnavailable(f"Generation failed: {e}"))
+        else:
+            self.counters["completed"] += 1
+            self._finish(job, None)
+
+    def _finish(self, job: Job, error):
+        job.error = error
+        job.done = True
+        if self._inflight.get(job.key) is job:
+            del self._inflight[job.key]
+        job.notify()
+
+    async def close(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        for job in list(self._inflight.values()):
+            if job.task is not None:
+                job.task.cancel()
+        self._worker_tasks = []
+
+    # ---- stats ----
+
+    def stats(self):
+        started = self.counters["started"]
+        return {
+            **self.counters,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "shared_slots": self.slots.count if self.slots is not None else None,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "avg_wait_seconds": round(self.wait_seconds_total / started, 4) if started else 0.0,
+            "max_wait_seconds": round(self.wait_seconds_max, 4),
+        }
+
+
+# -------------------- Shared Instance --------------------
+
+_dispatcher = None
+_dispatcher_loop = None
+_slots = None
+
+
+def get_slots():
+    """
+    Host-wide slots from LLM_SLOT_DIR (LLM_SLOTS of them, default
+    LLM_WORKERS), or None when unset. Use with several uvicorn workers so
+    the model server sees LLM_SLOTS generations in total, not per process.
+    """
+    global _slots
+    directory = os.getenv("LLM_SLOT_DIR")
+    if directory and _slots is None:
+        _slots = SlotFiles(directory, int(os.getenv("LLM_SLOTS", os.getenv("LLM_WORKERS", "2"))))
+    return _slots
+
+
+def get_dispatcher() -> LLMDispatcher:
+    """
+    Returns the dispatcher for the running event loop,
+    sized from LLM_WORKERS and LLM_QUEUE_SIZE.
+    """
+    global _dispatcher, _dispatcher_loop
+    loop = asyncio.get_running_loop()
+    if _dispatcher is None or _dispatcher_loop is not loop:
+        _dispatcher = LLMDispatcher(
+            workers=int(os.getenv("LLM_WORKERS", "2")),
+            max_queue=int(os.getenv("LLM_QUEUE_SIZE", "32")),
+            slots=get_slots(),
+        )
+        _dispatcher_loop = loop
+    return _dispatcher
+
+
+async def close_dispatcher():
+    if _dispatcher is not None:
+        await _dispatcher.close()
+
+
+def stream(prompt: str, model: str = None, priority: int = INTERACTIVE):
+    return get_dispatcher().stream(prompt, model, priority)
+
+
+async def generate(prompt: str, model: str = None, priority: int = INTERACTIVE) -> str:
+    return await get_dispatcher().generate(prompt, model, priority)
+
+
+def current_stats():
+    """Stats of the most recent dispatcher, or None before the first LLM call."""
+    return _dispatcher.stats() if _dispatcher is not None else None
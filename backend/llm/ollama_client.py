@@ -0,0 +1,86 @@
+import json
+import os
+
+import httpx
+
+# -------------------- Configuration --------------------
+# Read lazily so values from .env (loaded in main.py) are honoured.
+
+def _setting(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+def default_model() -> str:
+    return _setting("OLLAMA_MODEL", "phi")
+
+
+# -------------------- Shared Client --------------------
+
+_client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide Ollama client.
+    Connections are kept alive and reused across requests.
+    """
+    global _client
+    if _client is None:
+        pool_size = int(_setting("OLLAMA_POOL_SIZE", "32"))
+        _client = httpx.AsyncClient(
+            base_url=_setting("OLLAMA_URL", "http://localhost:11434"),
+            timeout=httpx.Timeout(
+                connect=float(_setting("OLLAMA_CONNECT_TIMEOUT", "5")),
+                read=float(_setting("OLLAMA_READ_TIMEOUT", "120")),
+                write=10.0,
+                pool=float(_setting("OLLAMA_POOL_TIMEOUT", "30")),
+            ),
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=60,
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# -------------------- Generation --------------------
+
+class OllamaError(Exception):
+    """Raised when Ollama reports an error inside a generation stream."""
+
+
+async def stream_generate(prompt: str, model: str = None):
+    """
+    Yields response tokens from Ollama as they are produced.
+    Cancelling the consumer closes the HTTP stream, which stops generation.
+    Raises OllamaError if the server reports an error mid-stream.
+    Callers should go through llm.dispatcher, which bounds concurrency.
+    """
+    payload = {
+        "model": model or default_model(),
+        "prompt": prompt,
+        "options": {"temperature": 0},
+    }
+
+    async with get_client().stream("POST", "/api/generate", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("error"):
+                # Sent inside a 200 stream when generation fails midway
+                raise OllamaError(chunk["error"])
+            if chunk.get("response"):
+                yield chunk["response"]
+            if chunk.get("done"):
+                break
+
@@ -0,0 +1,292 @@
+import ast
+import os
+import re
+
+from analyzers import c_family
+
+# -------------------- Budget --------------------
+
+# Rough size of a token for source code; good enough to stay inside a
+# small model's context window.
+CHARS_PER_TOKEN = 4
+
+# Lines shown around an error that has no enclosing function
+CONTEXT_LINES = 2
+
+
+def token_budget() -> int:
+    """Most tokens per prompt, template and errors included (LLM_PROMPT_TOKENS)."""
+    return int(os.getenv("LLM_PROMPT_TOKENS", "800"))
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# -------------------- Enclosing Blocks --------------------
+
+_PYTHON_HEADER = re.compile(r"(\s*)(?:async\s+def|def|class)\b")
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def _python_blocks(lines: list, code: str):
+    """(start, end) of every function and class, from the AST if the code parses."""
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return _indented_blocks(lines)
+    return [
+        (min([node.lineno] + [d.lineno for d in node.decorator_list]), node.end_lineno)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+    ]
+
+
+def _indented_blocks(lines: list):
+    """Same as _python_blocks, by indentation, for code that does not parse."""
+    blocks = []
+    for start, line in enumerate(lines, 1):
+        header = _PYTHON_HEADER.match(line)
+        if not header:
+            continue
+        end = start
+        for number in range(start + 1, len(lines) + 1):
+            body = lines[number - 1]
+            if body.strip():
+                if _indent(body) <= len(header.group(1)):
+                    break
+                end = number
+        blocks.append((start, end))
+    return blocks
+
+
+def _brace_blocks(lines: list):
+    """(start, end) of every top-level { } block, starting at its declaration."""
+    blocks = []
+    depth = 0
+    statement_start = None
+    block_start = None
+    for number, tokens in enumerate(c_family.scan_lines(lines), 1):
+        for kind, text, _ in tokens:
+            if kind == "directive":
+                statement_start = None
+                continue
+            if depth == 0 and statement_start is None:
+                statement_start = number
+            if kind != "punct":
+                continue
+            if text == "{":
+                if depth == 0:
+                    block_start = statement_start
+                depth += 1
+            elif text == "}" and depth:
+                depth -= 1
+                if depth == 0:
+                    blocks.append((block_start, number))
+                    statement_start = None
+            elif text == ";" and depth == 0:
+                statement_start = None
+    if depth:
+        blocks.append((block_start, len(lines)))  # unclosed to the end
+    return blocks
+
+
+def _leading_directives(lines: list):
+    """Lines 1..n holding the #includes etc. at the top of a C-family file."""
+    last = 0
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if stripped.startswith("#"):
+            last = number
+        elif stripped and not stripped.startswith("//"):
+            break
+    return [(1, last)] if last else []
+
+
+# -------------------- Regions --------------------
+
+def _merge(regions):
+    merged = []
+    for start, end in sorted(regions):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _region_tokens(lines: list, regions) -> int:
+    return sum(estimate_tokens("\n".join(lines[start - 1:end])) for start, end in regions)
+
+
+def select_regions(template: str, code: str, errors: list, language: str):
+    """
+    Line ranges (1-based, inclusive) to send for errors: each error's
+    innermost enclosing function or class (Python) or top-level block
+    (C family), else a few lines around it. Falls back to those few
+    lines, then to fewer of them, then to a shorter first one, so the
+    filled prompt stays within the token budget. Empty if not even the
+    first error's line fits.
+    """
+    lines = code.split("\n")
+    error_lines = sorted({min(max(error["line"], 1), len(lines)) for error in errors})
+    windows = [(max(1, n - CONTEXT_LINES), min(len(lines), n + CONTEXT_LINES)) for n in error_lines]
+
+    if language == "python":
+        blocks, extra = _python_blocks(lines, code), []
+    else:
+        blocks, extra = _brace_blocks(lines), _leading_directives(lines)
+
+    enclosing = []
+    for line, window in zip(error_lines, windows):
+        containing = [(s, e) for s, e in blocks if s <= line <= e]
+        enclosing.append(min(containing, key=lambda b: b[1] - b[0]) if containing else window)
+
+    budget = token_budget()
+
+    def fits(regions):
+        return estimate_tokens(_fill(template, lines, errors, language, regions)) <= budget
+
+    regions = _merge(enclosing + extra)
+    if fits(regions):
+        return regions
+    # Most leading windows that fit; the prompt grows with every window
+    low, high = 1, len(windows)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(_merge(windows[:middle] + extra)):
+            low = middle
+        else:
+            high = middle - 1
+    kept = windows[:low]
+    if fits(_merge(kept + extra)):
+        return _merge(kept + extra)
+
+    # One window is still too long: cut it down towards its error line
+    (start, end), line = kept[0], error_lines[0]
+    while (start, end) != (line, line) and not fits([(start, end)]):
+        if end - line >= line - start:
+            end -= 1
+        else:
+            start += 1
+    return [(start, end)] if fits([(start, end)]) else []
+
+
+def plan(template: str, code: str, errors: list, language: str):
+    """
+    Regions to send instead of the whole file, or None to send it whole:
+    a file whose whole prompt is within budget goes whole unless its
+    regions are under half of it. Empty if no excerpt fits.
+    """
+    if not errors:
+        return None
+    regions = select_regions(template, code, errors, language)
+    total = estimate_tokens(code)
+    if (
+        total <= token_budget()
+        and estimate_tokens(_fill(template, code.split("\n"), errors, language, None)) <= token_budget()
+        and 2 * _region_tokens(code.split("\n"), regions) > total
+    ):
+        return None
+    return regions
+
+
+# -------------------- Prompts --------------------
+
+EXCERPT_INSTRUCTIONS = """
+The code above is made of excerpts from a longer file, each under a
+"### Lines A-B" header. Return every excerpt corrected, under its own
+unchanged header, and nothing else.
+"""
+
+LANGUAGE_NAMES = {"python": "Python", "c": "C", "cpp": "C++"}
+
+
+def _output(language: str, excerpts: bool) -> str:
+    """What the template's {output} asks the model to return."""
+    if excerpts:
+        return 'the corrected excerpts, each under its unchanged "### Lines A-B" header'
+    return f"the corrected {LANGUAGE_NAMES.get(language, language)} code"
+
+_HEADER = re.compile(r"^\s*#{2,3}\s*Lines\s+(\d+)\s*-\s*(\d+)\s*$")
+_FENCE = re.compile(r"^\s*```")
+
+
+def _excerpts(lines: list, regions) -> str:
+    return "\n\n".join(
+        f"### Lines {start}-{end}\n" + "\n".join(lines[start - 1:end]) for start, end in regions
+    )
+
+
+def _fill(template: str, lines: list, errors: list, language: str, regions) -> str:
+    """The prompt for regions, or for the whole file if regions is None."""
+    if regions is None:
+        shown, listed = "\n".join(lines), errors
+    else:
+        shown = _excerpts(lines, regions)
+        listed = [e for e in errors if any(s <= e["line"] <= end for s, end in regions)]
+
+    error_block = "\n".join(f"Line {e['line']}: {e['message']}" for e in listed)
+    prompt = template.format(code=shown, errors=error_block, output=_output(language, regions is not None))
+    return prompt if regions is None else prompt + EXCERPT_INSTRUCTIONS
+
+
+def build_prompt(template: str, code: str, errors: list, language: str):
+    """
+    Fills template's {code} (and {errors}, as "Line N: message") with the
+    whole file if it is small, else with excerpts around the errors.
+    Only errors inside the excerpts are listed. {output} names what the
+    model should return, so the wording matches either form. Returns
+    None if no excerpt fits within the token budget.
+    """
+    regions = plan(template, code, errors, language)
+    if regions == []:
+        return None
+    return _fill(template, code.split("\n"), errors, language, regions)
+
+
+def _strip(block: list) -> list:
+    """Drops code fences and the blank line that separates excerpts."""
+    block = [line for line in block if not _FENCE.match(line)]
+    if block and not block[-1].strip():
+        block.pop()
+    return block
+
+
+def stitch(template: str, code: str, errors: list, language: str, response: str):
+    """
+    Turns the model's response to build_prompt into a whole corrected
+    file. Excerpts the model did not return stay as they were. Returns
+    None if the response cannot be matched to any excerpt, since it is
+    then not a whole file and must not be cached or reused.
+    """
+    regions = plan(template, code, errors, language)
+    if regions is None:
+        return response
+
+    replacements = {}
+    current, block = None, []
+    for line in response.split("\n"):
+        header = _HEADER.match(line)
+        if header:
+            if current is not None:
+                replacements[current] = _strip(block)
+            current, block = (int(header.group(1)), int(header.group(2))), []
+        elif current is not None:
+            block.append(line)
+    if current is not None:
+        replacements[current] = _strip(block)
+
+    if not replacements and len(regions) == 1:
+        replacements[regions[0]] = _strip(response.split("\n"))
+    if not any(region in replacements for region in regions):
+        return None
+
+    lines = code.split("\n")
+    for start, end in reversed(regions):
+        if (start, end) in replacements:
+            lines[start - 1:end] = replacements[(start, end)]
+    return "\n".join(lines)
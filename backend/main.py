@@ -1,16 +1,41 @@
-from fastapi import FastAPI
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from models import CodeInput
-from router import analyze_by_language
+from models import BatchInput, CodeInput, DocumentChange, DocumentOpen
+from router import analyze_by_language, stream_by_language
+from llm.ollama_client import close_client
+from llm.dispatcher import close_dispatcher, get_dispatcher
+from cache import get_cache
+from analysis_pool import shutdown_pool
+from batch import BatchError, analyze_batch, read_archive, receive_archive
+from documents import DocumentNotFound, VersionConflict, get_store
+from upload import UploadError, analyze_upload
+from metrics import REQUESTS, ServerTimingMiddleware, language_label, render, timed
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+# How often an in-flight analysis checks whether the client is still there
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_pool()
+    await close_dispatcher()
+    await close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # ----------- --------- CORS --------------------
 
-app.add_middleware(    
+app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Restrict in production
     allow_credentials=True,
@@ -18,18 +43,167 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ServerTimingMiddleware)
+
+# -------------------- Disconnect Handling --------------------
+
+async def run_until_disconnect(request: Request, coro):
+    """
+    Runs an analysis, cancelling it (and any LLM generation it started)
+    if the client goes away before it finishes.
+    """
+    task = asyncio.create_task(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                # 499: client closed request (nginx convention)
+                return Response(status_code=499)
+    finally:
+        if not task.done():
+            task.cancel()
+
 # -------------------- Health Check --------------------
 
 @app.get("/")
 def home():
     return {"message": "Backend is working!"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return get_cache().stats()
+
+
+@app.get("/llm/stats")
+async def llm_stats():
+    return get_dispatcher().stats()
+
+
+@app.get("/metrics")
+def metrics():
+    content, media_type = render()
+    return Response(content=content, media_type=media_type)
+
 # -------------------- Analyze Endpoint --------------------
 
 @app.post("/analyze")
-def analyze_code(data: CodeInput):
+async def analyze_code(data: CodeInput, request: Request):
     """
     Receives code + language
     Routes to appropriate language analyzer
     """
-    return analyze_by_language(data.language, data.code)
+    REQUESTS.labels("analyze", language_label(data.language)).inc()
+    result = await run_until_disconnect(
+        request, analyze_by_language(data.language, data.code)
+    )
+    if isinstance(result, Response):
+        return result
+
+    with timed("serialize"):
+        body = json.dumps(result)
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/analyze/stream")
+async def analyze_code_stream(data: CodeInput):
+    """
+    Same analysis as /analyze, streamed as NDJSON events.
+    Static findings arrive first, followed by LLM solution tokens.
+    """
+    REQUESTS.labels("analyze_stream", language_label(data.language)).inc()
+
+    async def events():
+        async for event in stream_by_language(data.language, data.code):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        # Stop nginx from buffering the stream
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/upload")
+async def analyze_code_upload(request: Request, language: str = None, filename: str = ""):
+    """
+    Static analysis of one file sent as the raw request body.
+    The body is read incrementally; large files are checked line by line.
+    Language comes from the query, the filename extension or the content.
+    """
+    REQUESTS.labels("analyze_upload", language_label(language)).inc()
+    length = request.headers.get("content-length")
+    try:
+        return await analyze_upload(
+            request.stream(), language, filename,
+            content_length=int(length) if length and length.isdigit() else None,
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+# -------------------- Batch Endpoints --------------------
+
+@app.post("/analyze/batch")
+async def analyze_code_batch(data: BatchInput):
+    """
+    Analyzes many files in one request.
+    Each file is routed by its language, extension or detected content.
+    """
+    REQUESTS.labels("analyze_batch", "").inc()
+    try:
+        return await analyze_batch(
+            ((f.path, f.code, f.language) for f in data.files),
+            include_fixes=data.include_fixes,
+        )
+    except BatchError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+@app.post("/analyze/batch/archive")
+async def analyze_code_archive(request: Request, include_fixes: bool = True):
+    """
+    Analyzes every source file in a zip or tarball sent as the request body.
+    """
+    REQUESTS.labels("analyze_batch_archive", "").inc()
+    try:
+        data = await receive_archive(request.stream())
+        # Decompressing can take a while; keep the event loop free
+        files = await asyncio.to_thread(read_archive, data)
+        return await analyze_batch(
+            ((path, code, None) for path, code in files),
+            include_fixes=include_fixes,
+        )
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# -------------------- Document Endpoints --------------------
+# For analyze-as-you-type: the client opens a document once, then sends
+# only its edits. Static findings only; fixes come from /analyze.
+
+@app.put("/documents/{doc_id}")
+def open_document(doc_id: str, data: DocumentOpen):
+    try:
+        return get_store().open(doc_id, data.language.lower(), data.text, data.version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.patch("/documents/{doc_id}")
+def change_document(doc_id: str, data: DocumentChange):
+    try:
+        return get_store().change(doc_id, [edit.model_dump() for edit in data.edits], data.version)
+    except DocumentNotFound:
+        raise HTTPException(status_code=404, detail="Unknown document; open it first")
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.delete("/documents/{doc_id}")
+def close_document(doc_id: str):
+    get_store().close(doc_id)
+    return {"closed": doc_id}
@@ -0,0 +1,187 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from analyzers import registry
+from analyzers.rules import rule_stats
+from cache import get_cache
+from fix_reuse import get_fix_index
+from llm.dispatcher import current_stats as dispatcher_stats
+
+# -------------------- Metrics --------------------
+
+REQUESTS = Counter(
+    "bugfinder_requests_total",
+    "Analysis requests by endpoint and selected language",
+    ["endpoint", "language"],
+)
+
+ANALYSES = Counter(
+    "bugfinder_analyses_total",
+    "Completed analyses by language and outcome (cached, clean, fixed, reused, static_only, timeout)",
+    ["language", "outcome"],
+)
+
+def language_label(language: str) -> str:
+    """Client-supplied language as a label: a supported one, "" if unset, else "other"."""
+    language = (language or "").lower()
+    if not language or language in registry.languages():
+        return language
+    return "other"     # keeps label cardinality bounded
+
+
+STAGE_SECONDS = Histogram(
+    "bugfinder_stage_seconds",
+    "Time spent per pipeline stage",
+    ["stage", "language"],
+    # Static passes take microseconds, LLM generation takes tens of seconds
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+ANALYSIS_TIMEOUTS = Counter(
+    "bugfinder_analysis_timeouts_total",
+    "Static checks stopped for running past ANALYSIS_TIMEOUT_SECONDS",
+    ["language"],
+)
+
+POOL_RECYCLES = Counter(
+    "bugfinder_analysis_pool_recycles_total",
+    "Times the analysis process pool was killed and replaced",
+)
+
+
+class StatsCollector:
+    """Exposes result cache and LLM queue stats at scrape time."""
+
+    def collect(self):
+        cache = get_cache().stats()
+        counter = CounterMetricFamily(
+            "bugfinder_cache_lookups", "Result cache lookups by outcome", labels=["outcome"]
+        )
+        for outcome in ("memory_hits", "disk_hits", "misses"):
+            counter.add_metric([outcome], cache[outcome])
+        yield counter
+        yield GaugeMetricFamily(
+            "bugfinder_cache_entries", "Results held in the in-memory cache", value=cache["memory_entries"]
+        )
+
+        rules = rule_stats()
+        if rules:
+            evaluations = CounterMetricFamily(
+                "bugfinder_rule_evaluations", "Times a rule's pattern was tried", labels=["language", "rule"]
+            )
+            matches = CounterMetricFamily(
+                "bugfinder_rule_matches", "Diagnostics reported per rule", labels=["language", "rule"]
+            )
+            seconds = CounterMetricFamily(
+                "bugfinder_rule_seconds", "Time spent matching per rule (RULES_PROFILE=1)", labels=["language", "rule"]
+            )
+            for language, rule_id, counter in rules:
+                evaluations.add_metric([language, rule_id], counter["evaluations"])
+                matches.add_metric([language, rule_id], counter["matches"])
+                seconds.add_metric([language, rule_id], counter["seconds"])
+            yield from (evaluations, matches, seconds)
+
+        fixes = get_fix_index()
+        if fixes is not None:
+            reuse = fixes.stats()
+            counter = CounterMetricFamily("bugfinder_fix_reuse", "Fix index lookups and updates", labels=["outcome"])
+            for outcome in ("lookups", "reused", "stored", "evictions"):
+                counter.add_metric([outcome], reuse[outcome])
+            yield counter
+            yield GaugeMetricFamily("bugfinder_fix_reuse_entries", "Fixes held for reuse", value=reuse["entries"])
+
+        queue = dispatcher_stats()
+        if queue is None:
+            return
+        yield GaugeMetricFamily("bugfinder_llm_queue_depth", "Generations waiting", value=queue["queue_depth"])
+        yield GaugeMetricFamily("bugfinder_llm_running", "Generations in progress", value=queue["running"])
+        yield GaugeMetricFamily(
+            "bugfinder_llm_max_wait_seconds", "Longest queue wait so far", value=queue["max_wait_seconds"]
+        )
+        jobs = CounterMetricFamily("bugfinder_llm_jobs", "LLM jobs by outcome", labels=["outcome"])
+        for outcome in ("submitted", "coalesced", "shed", "completed", "failed", "cancelled"):
+            jobs.add_metric([outcome], queue[outcome])
+        yield jobs
+
+
+REGISTRY.register(StatsCollector())
+
+_multiprocess_registry = None
+
+
+def render():
+    """
+    With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR so counters
+    and histograms are summed across them. Cache and queue stats are
+    always those of the worker that served the scrape.
+    """
+    global _multiprocess_registry
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    if _multiprocess_registry is None:
+        _multiprocess_registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(_multiprocess_registry)
+        _multiprocess_registry.register(StatsCollector())
+    return generate_latest(_multiprocess_registry), CONTENT_TYPE_LATEST
+
+
+# -------------------- Stage Timing --------------------
+
+# Stage timings for the current request, read by ServerTimingMiddleware
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+def observe(stage: str, seconds: float, language: str = ""):
+    STAGE_SECONDS.labels(stage, language).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        name = f"{stage}-{language}" if language else stage
+        timings.append((name, seconds))
+
+
+@contextmanager
+def timed(stage: str, language: str = ""):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, language)
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header listing the stages a request went through.
+    Streaming responses only list stages finished before headers were sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = []
+        token = _timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings]
+                entries.append(f"total;dur={total * 1000:.2f}")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", ", ".join(entries).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
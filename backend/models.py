@@ -1,7 +1,44 @@
 # -------------------- Request Model --------------------
 
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 class CodeInput(BaseModel):
     language: str
     code: str
+
+
+# -------------------- Batch Models --------------------
+
+class SourceFile(BaseModel):
+    path: str
+    code: str
+    language: Optional[str] = None  # inferred from extension / content when omitted
+
+
+class BatchInput(BaseModel):
+    files: List[SourceFile]
+    include_fixes: bool = True
+
+
+# -------------------- Document Models --------------------
+
+class DocumentOpen(BaseModel):
+    language: str
+    text: str
+    version: int = 0
+
+
+class TextEdit(BaseModel):
+    # 1-based positions, end_column exclusive (Monaco ranges)
+    start_line: int
+    start_column: int
+    end_line: int
+    end_column: int
+    text: str
+
+
+class DocumentChange(BaseModel):
+    version: int
+    edits: List[TextEdit]
@@ -1,14 +1,18 @@
-from analyzers.python_analyzer import review_with_llm as analyze_python
-from analyzers.javascript_analyzer import review_with_llm as analyze_javascript
-from analyzers.java_analyzer import review_with_llm as analyze_java
-from analyzers.c_analyzer import review_with_llm as analyze_c
-from analyzers.cpp_analyzer import review_with_llm as analyze_cpp
-from language_detector import detect_language
+import asyncio
+import time
 
+from analyzers import registry
+from language_detector import detect_language
+from llm.ollama_client import default_model
+from llm.dispatcher import INTERACTIVE, LLMUnavailable, fix_unavailable, stream
+from analysis_pool import AnalysisTimeout, static_errors
+from cache import cache_key, get_cache
+from fix_reuse import get_fix_index
+from metrics import ANALYSES, observe, timed
 
-def analyze_by_language(language: str, code: str):
-    selected = language.lower()
-    detected = detect_language(code)
+def language_mismatch(selected: str, code: str):
+    with timed("detect_language"):
+        detected = detect_language(code)
 
     # 🔴 HARD STOP: language mismatch
     if detected != "unknown" and detected != selected:
@@ -27,29 +31,141 @@ def analyze_by_language(language: str, code: str):
             "additional_tips": ""
         }
 
+    return None
+
+
+def unsupported_language(selected: str):
+    return {
+        "errors": [
+            {
+                "line": 1,
+                "message": f"Unsupported language selected: {selected}",
+                "severity": "ERROR",
+                "code": "LANG002"
+            }
+        ],
+        "warnings": [],
+        "hint": "",
+        "solution": "",
+        "additional_tips": ""
+    }
+
+
+def analysis_timed_out(selected: str, error: AnalysisTimeout):
+    return {
+        "errors": [
+            {
+                "line": 1,
+                "message": str(error),
+                "severity": "ERROR",
+                "code": "LIMIT001"
+            }
+        ],
+        "warnings": [],
+        "hint": f"This {selected} code is too large or complex to analyze; try a smaller part of it.",
+        "solution": "",
+        "additional_tips": ""
+    }
+
+
+async def stream_by_language(language: str, code: str):
+    """
+    Yields analysis events as they become available:
+      {"type": "static", "result": ...}  static findings, before any LLM work
+      {"type": "token", "text": ...}     LLM solution tokens
+      {"type": "done", "result": ...}    final result (always last)
+    """
+    selected = language.lower()
+
+    mismatch = language_mismatch(selected, code)
+    if mismatch:
+        yield {"type": "done", "result": mismatch}
+        return
+
     # ✅ Correct routing
-    if selected == "python":
-        return analyze_python(code)
-    elif selected == "javascript":
-        return analyze_javascript(code)
-    elif selected == "java":
-        return analyze_java(code)
-    elif selected == "c":
-        return analyze_c(code)
-    elif selected == "cpp":
-        return analyze_cpp(code)
-    else:
-        return {
-            "errors": [
-                {
-                    "line": 1,
-                    "message": f"Unsupported language selected: {selected}",
-                    "severity": "ERROR",
-                    "code": "LANG002"
-                }
-            ],
-            "warnings": [],
-            "hint": "",
-            "solution": "",
-            "additional_tips": ""
-        }
+    if not registry.is_supported(selected):
+        yield {"type": "done", "result": unsupported_language(selected)}
+        return
+
+    # Imported on first use
+    _, analyzer = registry.load(selected)
+
+    # Fixes are generated at temperature 0, so identical inputs give identical results
+    key = cache_key(
+        selected, code, analyzer.ANALYZER_VERSION, default_model(),
+        getattr(analyzer, "PROMPT_TEMPLATE", ""),
+    )
+    with timed("cache_lookup"):
+        cached = await get_cache().get_async(key)
+    if cached is not None:
+        ANALYSES.labels(selected, "cached").inc()
+        yield {"type": "done", "result": cached}
+        return
+
+    try:
+        with timed("static", selected):
+            errors = await static_errors(selected, code)
+    except AnalysisTimeout as e:
+        ANALYSES.labels(selected, "timeout").inc()
+        yield {"type": "done", "result": analysis_timed_out(selected, e)}
+        return
+    prompt = analyzer.build_prompt(code, errors) if errors else None
+
+    if prompt is None:
+        result = analyzer.build_result(code, errors)
+        await get_cache().set_async(key, result)
+        ANALYSES.labels(selected, "clean").inc()
+        yield {"type": "done", "result": result}
+        return
+
+    # A near-duplicate of code fixed before can reuse that fix
+    fixes = get_fix_index()
+    if fixes is not None:
+        with timed("fix_reuse", selected):
+            reused = await asyncio.to_thread(fixes.lookup, selected, code, errors)
+        if reused is not None:
+            result = analyzer.build_result(code, errors, reused)
+            await get_cache().set_async(key, result)
+            ANALYSES.labels(selected, "reused").inc()
+            yield {"type": "done", "result": result}
+            return
+
+    yield {"type": "static", "result": {**analyzer.build_result(code, errors), "solution": ""}}
+
+    tokens = []
+    started = time.perf_counter()
+    try:
+        async for token in stream(prompt, priority=INTERACTIVE):
+            if not tokens:
+                # Includes time spent waiting in the LLM queue
+                observe("llm_first_token", time.perf_counter() - started, selected)
+            tokens.append(token)
+            yield {"type": "token", "text": token}
+    except LLMUnavailable:
+        # Shed or failed: static results only, and not cached
+        ANALYSES.labels(selected, "static_only").inc()
+        yield {"type": "done", "result": fix_unavailable(analyzer.build_result(code, errors))}
+        return
+    observe("llm_generation", time.perf_counter() - started, selected)
+
+    # The tokens may cover excerpts only; the result holds the whole file
+    solution = analyzer.apply_fix(code, errors, "".join(tokens))
+    if solution is None:
+        # Excerpts that cannot be stitched back are not a whole-file fix
+        ANALYSES.labels(selected, "static_only").inc()
+        yield {"type": "done", "result": fix_unavailable(analyzer.build_result(code, errors))}
+        return
+    result = analyzer.build_result(code, errors, solution)
+    await get_cache().set_async(key, result)
+    if fixes is not None:
+        await asyncio.to_thread(fixes.remember, selected, code, errors, solution)
+    ANALYSES.labels(selected, "fixed").inc()
+    yield {"type": "done", "result": result}
+
+
+async def analyze_by_language(language: str, code: str):
+    result = None
+    async for event in stream_by_language(language, code):
+        if event["type"] == "done":
+            result = event["result"]
+    return result
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from llm import dispatcher
+from llm.dispatcher import BATCH, INTERACTIVE, LLMDispatcher, LLMUnavailable, QueueFull
+
+
+class FakeModel:
+    """Stands in for stream_generate; each prompt streams its tokens once released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+        self.cancelled = []
+
+    async def stream_generate(self, prompt, model):
+        self.calls.append(prompt)
+        try:
+            await self.release.wait()
+            for token in (prompt, "-", "done"):
+                yield token
+        except asyncio.CancelledError:
+            self.cancelled.append(prompt)
+            raise
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeModel()
+    monkeypatch.setattr(dispatcher, "stream_generate", fake.stream_generate)
+    return fake
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_identical_prompts_share_one_generation(model):
+    async def scenario():
+        llm = LLMDispatcher(workers=2, max_queue=8)
+        callers = [asyncio.create_task(llm.generate("fix me", "m")) for _ in range(3)]
+        await _settle()
+        model.release.set()
+        results = await asyncio.gather(*callers)
+        await llm.close()
+        return llm, results
+
+    llm, results = asyncio.run(scenario())
+    assert results == ["fix me-done"] * 3
+    assert model.calls == ["fix me"]
+    assert llm.counters["submitted"] == 1
+    assert llm.counters["coalesced"] == 2
+
+
+def test_late_subscriber_replays_earlier_tokens(model):
+    async def scenario():
+        llm = LLMDispatcher(workers=1, max_queue=8)
+        first = llm.stream("p", "m")
+        model.release.set()
+        token = await first.__anext__()
+        late = asyncio.create_task(llm.generate("p", "m"))
+        rest = [t async for t in first]
+        result = await late
+        await llm.close()
+        return [token] + rest, result
+
+    tokens, late = asyncio.run(scenario())
+    assert "".join(tokens) == late == "p-done"
+
+
+def test_abandoned_running_job_is_cancelled(model):
+    async def scenario():
+        llm = LLMDispatcher(workers=1, max_queue=8)
+        caller = asyncio.create_task(llm.generate("slow", "m"))
+        await _settle()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await _settle()
+        await llm.close()
+        return llm
+
+    llm = asyncio.run(scenario())
+    assert model.cancelled == ["slow"]
+    assert llm.counters["cancelled"] == 1
+    assert llm.running == 0
+
+
+def test_abandoned_queued_job_never_starts(model):
+    async def scenario():
+        llm = LLMDispatcher(workers=1, max_queue=8)
+        running = asyncio.create_task(llm.generate("first", "m"))
+        waiting = asyncio.create_task(llm.generate("second", "m"))
+        await _settle()
+        waiting.cancel()
+        await _settle()
+        queued = llm.queued
+        model.release.set()
+        await running
+        await llm.close()
+        return llm, queued
+
+    llm, queued = asyncio.run(scenario())
+    assert queued == 0
+    assert model.calls == ["first"]
+    assert llm.counters["started"] == 1
+
+
+def test_full_queue_sheds_new_prompts_but_coalesces_known_ones(model):
+    async def scenario():
+        llm = LLMDispatcher(workers=1, max_queue=1)
+        running = asyncio.create_task(llm.generate("a", "m"))
+        await _settle()
+        waiting = asyncio.create_task(llm.generate("b", "m"))
+        await _settle()
+        with pytest.raises(QueueFull):
+            await llm.generate("c", "m")
+        duplicate = asyncio.create_task(llm.generate("b", "m"))
+        model.release.set()
+        results = await asyncio.gather(running, waiting, duplicate)
+        await llm.close()
+        return llm, results
+
+    llm, results = asyncio.run(scenario())
+    assert results == ["a-done", "b-done", "b-done"]
+    assert llm.counters["shed"] == 1
+    assert llm.counters["coalesced"] == 1
+
+
+def test_interactive_jobs_start_before_batch_jobs(model):
+    async def scenario():
+        llm = LLMDispatcher(workers=1, max_queue=8)
+        blocker = asyncio.create_task(llm.generate("blocker", "m"))
+        await _settle()
+        batch = asyncio.create_task(llm.generate("batch", "m", priority=BATCH))
+        interactive = asyncio.create_task(llm.generate("interactive", "m", priority=INTERACTIVE))
+        await _settle()
+        model.release.set()
+        await asyncio.gather(blocker, batch, interactive)
+        await llm.close()
+
+    asyncio.run(scenario())
+    assert model.calls == ["blocker", "interactive", "batch"]
+
+
+def test_failed_generation_reaches_every_subscriber(monkeypatch):
+    async def broken(prompt, model):
+        yield "partial"
+        raise ValueError("malformed stream")
+
+    monkeypatch.setattr(dispatcher, "stream_generate", broken)
+
+    async def scenario():
+        llm = LLMDispatcher(workers=1, max_queue=8)
+        callers = [asyncio.create_task(llm.generate("p", "m")) for _ in range(2)]
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        await llm.close()
+        return llm, results
+
+    llm, results = asyncio.run(scenario())
+    assert all(isinstance(r, LLMUnavailable) for r in results)
+    assert llm.counters["failed"] == 1
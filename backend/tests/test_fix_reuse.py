@@ -0,0 +1,85 @@
+import subprocess
+import sys
+
+from fix_reuse import FixIndex, apply_diff, canonicalize, minhash
+
+ORIGINAL = '''def total(items):
+    # add up the items
+    s = 0
+    for item in items:
+        s += item
+    print("total of items:", s)
+    return s
+print(totl(items))
+'''
+
+RENAMED = '''def add(values):
+    # add up the values, items are numbers
+    acc = 0
+    for v in values:
+        acc += v
+    print("sum of items s:", acc)
+    return acc
+print(totl(values))
+'''
+
+ERRORS = [{"line": 8, "code": "PY002", "message": "name 'totl' is not defined", "severity": "ERROR"}]
+
+
+def test_renamed_copy_gets_the_fix_on_its_own_source():
+    index = FixIndex(threshold=0.5)
+    index.remember("python", ORIGINAL, ERRORS, ORIGINAL.replace("print(totl(", "print(total("))
+
+    fixed = index.lookup("python", RENAMED, ERRORS)
+
+    # Strings and comments are the submission's own; only the fixed line changed
+    assert fixed == RENAMED.replace("print(totl(", "print(add(")
+    assert index.stats()["reused"] == 1
+
+
+def test_comments_and_names_do_not_affect_canonical_tokens():
+    same_strings = RENAMED.replace('"sum of items s:"', '"total of items:"')
+
+    assert canonicalize("python", ORIGINAL)[0] == canonicalize("python", same_strings)[0]
+    assert canonicalize("python", RENAMED)[1] == ["add", "values", "acc", "v", "totl"]
+
+
+def test_fix_is_not_reused_when_its_changed_line_differs():
+    index = FixIndex(threshold=0.5)
+    index.remember("python", ORIGINAL, ERRORS, ORIGINAL.replace("print(totl(items))", "print(total(items))"))
+    other = RENAMED.replace("print(totl(values))", "print(totl([1, 2]))")
+
+    assert index.lookup("python", other, ERRORS) is None
+
+
+def test_apply_diff_keeps_lines_only_the_target_has():
+    original = "a\nb\nc\n"
+    fixed = "a\nB\nc\n"
+    target = "first\na\nb\nmiddle\nc\n"
+
+    assert apply_diff(original, fixed, "a\nb\nc\n") == fixed
+    assert apply_diff(original, fixed, target) == "first\na\nB\nmiddle\nc\n"
+    assert apply_diff(original, fixed, "a\nx\nc\n") is None
+
+
+def test_c_identifiers_inside_strings_are_left_alone():
+    code = 'int main() {\n    int count = 0; /* count */\n    printf("count=%d\\n", count)\n    return 0;\n}\n'
+    errors = [{"line": 3, "code": "C001", "message": "Missing semicolon", "severity": "ERROR"}]
+    index = FixIndex(threshold=0.5)
+    index.remember("c", code, errors, code.replace("count)\n", "count);\n"))
+
+    renamed = code.replace("count", "n").replace('"n=%d', '"count=%d')
+    assert index.lookup("c", renamed, errors) == renamed.replace("n)\n", "n);\n")
+
+
+def test_signatures_agree_across_processes():
+    tokens, _ = canonicalize("python", ORIGINAL)
+    script = (
+        "import sys; sys.path.insert(0, sys.argv[1]); "
+        "from fix_reuse import canonicalize, minhash; "
+        f"print(minhash(canonicalize('python', {ORIGINAL!r})[0]))"
+    )
+    backend = __file__.rsplit("/tests/", 1)[0]
+    output = subprocess.run([sys.executable, "-c", script, backend], capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == str(minhash(tokens))
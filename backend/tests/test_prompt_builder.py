@@ -0,0 +1,123 @@
+import re
+
+import pytest
+
+from llm import prompt_builder
+from llm.prompt_builder import build_prompt, estimate_tokens, plan, stitch
+
+TEMPLATE = """Fix this code. Return ONLY {output}.
+
+Errors:
+{errors}
+
+Code:
+{code}
+"""
+
+
+@pytest.fixture(autouse=True)
+def budget(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_TOKENS", "400")
+
+
+def _c_file():
+    functions = [f"int g{i}(void) {{\n    return {i};\n}}\n" for i in range(60)]
+    return "\n".join([
+        "#include <stdio.h>",
+        "",
+        "int f(void) {",
+        "    int x = 1",
+        "",
+        "    return x;",
+        "}",
+        "",
+        *functions,
+        "int h(void) {",
+        "    int y = 2",
+        "",
+        "    return y;",
+        "}",
+    ])
+
+
+def _errors(code):
+    lines = code.split("\n")
+    return [
+        {"line": n, "message": "Missing semicolon", "severity": "ERROR", "code": "C001"}
+        for n, line in enumerate(lines, 1) if re.search(r"= \d$", line)
+    ]
+
+
+def _reply(code, regions, fenced=True, fix=lambda text: text):
+    lines = code.split("\n")
+    parts = []
+    for start, end in regions:
+        body = fix("\n".join(lines[start - 1:end]))
+        parts.append(f"### Lines {start}-{end}\n" + (f"```c\n{body}\n```" if fenced else body))
+    return "\n\n".join(parts) + "\n"
+
+
+def test_unchanged_excerpts_stitch_back_to_the_same_file():
+    code = _c_file()
+    errors = _errors(code)
+    regions = plan(TEMPLATE, code, errors, "c")
+    assert regions, "file should be sent as excerpts"
+
+    for fenced in (True, False):
+        assert stitch(TEMPLATE, code, errors, "c", _reply(code, regions, fenced)) == code
+
+
+def test_fixed_excerpts_replace_only_their_lines():
+    code = _c_file()
+    errors = _errors(code)
+    regions = plan(TEMPLATE, code, errors, "c")
+    fixed = stitch(TEMPLATE, code, errors, "c", _reply(code, regions, fix=lambda t: re.sub(r"= (\d)$", r"= \1;", t, flags=re.M)))
+
+    assert fixed == code.replace("int x = 1\n", "int x = 1;\n").replace("int y = 2\n", "int y = 2;\n")
+
+
+def test_blank_lines_at_excerpt_edges_are_kept():
+    code = "\n".join(["x = 1", "", "", "y = (", "", "", "z = 3"] + [f"v{i} = {i}" for i in range(300)])
+    errors = [{"line": 4, "message": "'(' was never closed", "severity": "ERROR", "code": "PY001"}]
+    regions = plan(TEMPLATE, code, errors, "python")
+    assert regions == [(2, 6)]
+
+    assert stitch(TEMPLATE, code, errors, "python", _reply(code, regions)) == code
+
+
+def test_reply_without_headers_is_unusable_for_several_excerpts():
+    code = _c_file()
+    errors = _errors(code)
+    assert len(plan(TEMPLATE, code, errors, "c")) > 1
+
+    assert stitch(TEMPLATE, code, errors, "c", "int main(void) { return 0; }") is None
+
+
+def test_small_file_is_sent_and_returned_whole():
+    code = "x = (\nprint(x)\n"
+    errors = [{"line": 1, "message": "'(' was never closed", "severity": "ERROR", "code": "PY001"}]
+
+    assert plan(TEMPLATE, code, errors, "python") is None
+    assert stitch(TEMPLATE, code, errors, "python", "x = ()\nprint(x)\n") == "x = ()\nprint(x)\n"
+
+
+def test_whole_prompt_stays_within_budget(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_TOKENS", "120")
+    code = "\n".join(f"value_{i} = {'1 + ' * 30}1" for i in range(200))
+    errors = [
+        {"line": n, "message": "something is wrong here", "severity": "ERROR", "code": "PY001"}
+        for n in range(10, 200, 10)
+    ]
+
+    prompt = build_prompt(TEMPLATE, code, errors, "python")
+    assert prompt is not None
+    assert estimate_tokens(prompt) <= prompt_builder.token_budget()
+
+
+def test_no_prompt_when_not_even_the_error_line_fits(monkeypatch):
+    monkeypatch.setenv("LLM_PROMPT_TOKENS", "60")
+    code = "\n".join(f"value_{i} = {'1 + ' * 100}1" for i in range(50))
+    errors = [{"line": 25, "message": "something is wrong here", "severity": "ERROR", "code": "PY001"}]
+
+    assert build_prompt(TEMPLATE, code, errors, "python") is None
+    assert stitch(TEMPLATE, code, errors, "python", "anything") is None
@@ -0,0 +1,65 @@
+import ast
+
+from analyzers.python_analyzer import MAX_SYNTAX_ERRORS, parse_with_recovery, static_python_errors
+
+
+def _found(diagnostics):
+    return [(d["line"], d["code"]) for d in diagnostics]
+
+
+def test_recovery_reports_every_broken_statement():
+    code = "x = (1 +\ny = 2\ndef f(:\n    return y\nprint(z\n"
+    tree, diagnostics, removed = parse_with_recovery(code)
+
+    assert tree is not None
+    assert _found(diagnostics) == [(1, "PY001"), (3, "PY001"), (5, "PY001")]
+    # Names in removed lines are not reported as undefined later
+    assert {"x", "y", "f"} <= removed
+
+
+def test_block_after_a_broken_header_stays_attached():
+    code = (
+        "def f(x)\n"
+        "    y = x +\n"
+        "    return y\n"
+        "\n"
+        "class C\n"
+        "    def g(self):\n"
+        "        return undefined_name\n"
+    )
+    tree, diagnostics, _ = parse_with_recovery(code)
+
+    assert _found(diagnostics) == [(1, "PY001"), (2, "PY001"), (5, "PY001")]
+    # Each broken header became "if True:", so its body is still nested under it
+    bodies = [node for node in tree.body if isinstance(node, ast.If)]
+    assert [len(node.body) for node in bodies] == [2, 1]
+    assert isinstance(bodies[1].body[0], ast.FunctionDef)
+    assert (7, "PY002") in _found(static_python_errors(code))
+
+
+def test_c_style_loop_is_reported_and_the_rest_still_checked():
+    code = "for (int i = 0; i < 3; i++):\n    print(i)\nprint(q)\n"
+
+    assert _found(static_python_errors(code)) == [(1, "PY003"), (3, "PY002")]
+
+
+def test_indentation_errors_stop_recovery():
+    tree, diagnostics, _ = parse_with_recovery("def f():\nreturn 1\n")
+
+    assert tree is None
+    assert _found(diagnostics) == [(2, "PY001")]
+
+
+def test_recovery_gives_up_after_max_syntax_errors():
+    code = "".join(f"a{i} = = 1\n" for i in range(MAX_SYNTAX_ERRORS + 5))
+    tree, diagnostics, _ = parse_with_recovery(code)
+
+    assert tree is None
+    assert [d["line"] for d in diagnostics] == list(range(1, MAX_SYNTAX_ERRORS + 1))
+
+
+def test_clean_code_parses_without_diagnostics():
+    tree, diagnostics, removed = parse_with_recovery("def f(a):\n    return a\n")
+
+    assert isinstance(tree, ast.Module)
+    assert diagnostics == [] and removed == set()
@@ -0,0 +1,81 @@
+import ast
+
+import pytest
+
+from analyzers import java_analyzer, javascript_analyzer, python_analyzer
+from analyzers.python_analyzer import ScopeAnalyzer
+from analyzers.rules import Rule, RuleSet
+
+
+@pytest.fixture(autouse=True)
+def no_rule_settings(monkeypatch):
+    monkeypatch.delenv("RULES_DISABLED", raising=False)
+    monkeypatch.delenv("RULES_ENABLED", raising=False)
+
+
+def _fresh(rule_set: RuleSet) -> RuleSet:
+    # Settings are read when a set is compiled, so each test compiles its own
+    return RuleSet(rule_set.language, rule_set.rules, rule_set.lexer)
+
+
+def _ids(rule_set, diagnostics):
+    by_message = {rule.message: rule.id for rule in rule_set.rules}
+    return [by_message[d["message"]] for d in diagnostics]
+
+
+JS = "var x = 1\nif (x == 2) console.log(x)\nif (x != 3) {}\n"
+
+
+def test_all_default_rules_run():
+    rules = _fresh(javascript_analyzer.RULES)
+
+    assert set(_ids(rules, rules.check(JS))) == {"js-var", "js-loose-equality", "js-semicolon", "js-loose-inequality"}
+
+
+def test_disabled_rules_are_skipped(monkeypatch):
+    monkeypatch.setenv("RULES_DISABLED", "js-var, js-loose-equality")
+    rules = _fresh(javascript_analyzer.RULES)
+
+    assert set(_ids(rules, rules.check(JS))) == {"js-semicolon", "js-loose-inequality"}
+    assert "js-var" not in rules.counters
+
+
+def test_opt_in_rules_run_only_when_enabled(monkeypatch):
+    rule_set = RuleSet("javascript", [
+        Rule("js-var", "JS002", "Prefer let or const over var", tokens="var"),
+        Rule("js-eval", "JS900", "Avoid eval", tokens="eval (", enabled=False),
+    ])
+    code = "var f = eval(\"1\")\n"
+
+    assert _ids(rule_set, _fresh(rule_set).check(code)) == ["js-var"]
+    monkeypatch.setenv("RULES_ENABLED", "js-eval")
+    assert _ids(rule_set, _fresh(rule_set).check(code)) == ["js-var", "js-eval"]
+
+
+def test_disabled_wins_over_enabled(monkeypatch):
+    monkeypatch.setenv("RULES_ENABLED", "java-class-name")
+    monkeypatch.setenv("RULES_DISABLED", "java-class-name,java-main")
+    rules = _fresh(java_analyzer.RULES)
+
+    assert _ids(rules, rules.check("class lower { }")) == []
+
+
+def test_missing_rules_report_once_per_file():
+    rules = _fresh(java_analyzer.RULES)
+    diagnostics = rules.check("interface Shape {}")
+
+    assert _ids(rules, diagnostics) == ["java-class", "java-main"]
+    assert all(d["line"] == 0 for d in diagnostics)
+
+
+def test_ast_rules_follow_the_settings(monkeypatch):
+    code = "value = 1\nprint(value == None)\n"
+
+    def run():
+        analyzer = ScopeAnalyzer(_fresh(python_analyzer.RULES))
+        analyzer.visit(ast.parse(code))
+        return [d["code"] for d in analyzer.report()]
+
+    assert run() == ["PY103"]
+    monkeypatch.setenv("RULES_DISABLED", "py-none-comparison")
+    assert run() == []
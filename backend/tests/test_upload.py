@@ -0,0 +1,82 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import upload
+from analyzers import c_analyzer
+
+
+@pytest.fixture(autouse=True)
+def small_buffer(monkeypatch):
+    # Anything over 1 KB is checked line by line
+    monkeypatch.setenv("UPLOAD_BUFFER_BYTES", "1024")
+
+
+async def _chunks(text: str, size: int = 512):
+    data = text.encode()
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+        await asyncio.sleep(0)
+
+
+def _c_source(functions: int, broken: int):
+    """C code whose first `broken` functions miss a semicolon."""
+    return "".join(
+        f"int f{i}(void) {{\n    int x = {i}{'' if i < broken else ';'}\n    return x;\n}}\n"
+        for i in range(functions)
+    )
+
+
+def test_concurrent_streamed_uploads_outnumbering_the_executor():
+    async def scenario():
+        # Fewer default-executor threads than uploads: checkers must not need one each
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(2))
+        sources = [_c_source(300, broken) for broken in range(1, 7)]
+        results = await asyncio.wait_for(
+            asyncio.gather(*(upload.analyze_upload(_chunks(s), "c", "a.c") for s in sources)),
+            timeout=30,
+        )
+        # The loop's own threads still serve other work afterwards
+        assert await asyncio.to_thread(lambda: "free") == "free"
+        return sources, results
+
+    sources, results = asyncio.run(scenario())
+    for broken, (source, result) in enumerate(zip(sources, results), 1):
+        assert result["streamed"] is True
+        assert result["lines"] == source.count("\n")
+        assert result["errors"] == c_analyzer.static_c_errors(source)
+        assert len([e for e in result["errors"] if "semicolon" in e["message"]]) == broken
+
+
+def test_streamed_result_matches_the_buffered_check(monkeypatch):
+    source = _c_source(200, 3)
+
+    streamed = asyncio.run(upload.analyze_upload(_chunks(source), "c", "a.c"))
+    monkeypatch.setenv("UPLOAD_BUFFER_BYTES", str(len(source) + 1))
+    buffered = asyncio.run(upload.analyze_upload(_chunks(source), "c", "a.c"))
+
+    assert streamed["streamed"] and not buffered["streamed"]
+    assert streamed["errors"] == buffered["errors"]
+
+
+def test_slow_streamed_check_times_out(monkeypatch):
+    monkeypatch.setenv("ANALYSIS_TIMEOUT_SECONDS", "0.2")
+
+    def slow(lines):
+        for _ in lines:
+            time.sleep(0.01)
+        return []
+
+    monkeypatch.setattr(c_analyzer, "static_errors_from_lines", slow)
+    result = asyncio.run(upload.analyze_upload(_chunks(_c_source(300, 0)), "c", "a.c"))
+
+    assert [e["code"] for e in result["errors"]] == ["LIMIT001"]
+
+
+def test_oversized_upload_is_rejected(monkeypatch):
+    monkeypatch.setenv("UPLOAD_MAX_BYTES", "2048")
+
+    with pytest.raises(upload.UploadError):
+        asyncio.run(upload.analyze_upload(_chunks(_c_source(300, 0)), "c", "a.c"))
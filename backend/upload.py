@@ -0,0 +1,217 @@
+import asyncio
+import codecs
+import os
+import queue
+import threading
+import time
+
+from analysis_pool import AnalysisTimeout, static_errors, timeout_seconds
+from analyzers import registry
+from batch import resolve_language
+from language_detector import SAMPLE_CHARS
+from metrics import ANALYSIS_TIMEOUTS, timed
+from router import analysis_timed_out, language_mismatch, unsupported_language
+
+# -------------------- Limits --------------------
+
+def _limit(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def max_upload_bytes() -> int:
+    return _limit("UPLOAD_MAX_BYTES", 64 * 1024 * 1024)
+
+
+def buffer_bytes() -> int:
+    # Uploads up to this size are held whole and get the full static check
+    return _limit("UPLOAD_BUFFER_BYTES", 1024 * 1024)
+
+
+def max_line_chars() -> int:
+    return _limit("UPLOAD_MAX_LINE_CHARS", 1024 * 1024)
+
+
+# Chunks of lines waiting for the checker thread
+QUEUE_CHUNKS = 8
+
+
+class UploadError(ValueError):
+    """Raised when an upload is too large to analyze."""
+
+
+# -------------------- Reading --------------------
+
+async def _bounded(chunks, limit: int):
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > limit:
+            raise UploadError(f"Upload exceeds {limit} bytes")
+        yield chunk
+
+
+class LineSplitter:
+    """Decodes UTF-8 chunks and returns the complete lines seen so far."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._tail = ""
+        self.lines = 0
+
+    def feed(self, data: bytes, final: bool = False):
+        lines = (self._tail + self._decoder.decode(data, final)).split("\n")
+        self._tail = "" if final else lines.pop()
+        if final and lines[-1] == "":
+            lines.pop()  # trailing newline, as str.splitlines() does
+        if len(self._tail) > max_line_chars():
+            raise UploadError(f"Line {self.lines + 1} exceeds {max_line_chars()} characters")
+        self.lines += len(lines)
+        return [line.rstrip("\r") for line in lines]
+
+
+# -------------------- Analysis --------------------
+
+async def analyze_upload(chunks, language: str = None, filename: str = "", content_length: int = None):
+    """
+    Static analysis of a file that arrives as a stream of byte chunks.
+
+    Small files are read whole and get the regular static check. Larger
+    ones are decoded line by line and fed to the analyzer's
+    static_errors_from_lines, so memory stays flat however big the file is.
+    Language detection only looks at the first chunk of the file.
+    """
+    limit = max_upload_bytes()
+    if content_length is not None and content_length > limit:
+        raise UploadError(f"Upload exceeds {limit} bytes")
+    chunks = _bounded(chunks, limit)
+
+    head = bytearray()
+    complete = True
+    async for chunk in chunks:
+        head += chunk
+        if len(head) > buffer_bytes():
+            complete = False
+            break
+
+    # Four bytes per character at most
+    prefix = bytes(head[:SAMPLE_CHARS * 4]).decode("utf-8-sig", errors="replace")
+    selected = resolve_language(filename, prefix, language)
+    if not registry.is_supported(selected or ""):
+        return unsupported_language(selected or "unknown")
+    if language:
+        mismatch = language_mismatch(selected, prefix)
+        if mismatch:
+            return mismatch
+
+    spec = registry.get_spec(selected)
+    _, analyzer = spec.load()
+
+    if complete:
+        code = bytes(head).decode("utf-8-sig", errors="replace")
+        try:
+            with timed("static", selected):
+                errors = await static_errors(selected, code)
+        except AnalysisTimeout as e:
+            return analysis_timed_out(selected, e)
+        line_count, byte_count = len(code.splitlines()), len(head)
+    else:
+        if not spec.supports("line_stream"):
+            raise UploadError(f"{selected} files larger than {buffer_bytes()} bytes are not supported")
+        try:
+            with timed("static", selected):
+                errors, line_count, byte_count = await _stream_lines(analyzer, head, chunks)
+        except AnalysisTimeout as e:
+            ANALYSIS_TIMEOUTS.labels(selected).inc()
+            return analysis_timed_out(selected, e)
+
+    # Static findings only, like the document API
+    result = {**analyzer.build_result("", errors), "solution": ""}
+    return {
+        **result,
+        "language": selected,
+        "lines": line_count,
+        "bytes": byte_count,
+        "streamed": not complete,
+    }
+
+
+async def _stream_lines(analyzer, head: bytearray, chunks):
+    """
+    Runs analyzer.static_errors_from_lines on its own thread, handing it
+    lines as chunks arrive. At most QUEUE_CHUNKS chunks wait at a time;
+    the reader waits for room on the event loop, never on a pool thread.
+    Raises AnalysisTimeout once the checker has been busy (not waiting for
+    lines) longer than ANALYSIS_TIMEOUT_SECONDS.
+    Returns (errors, line count, byte count).
+    """
+    loop = asyncio.get_running_loop()
+    pending = queue.Queue()
+    room = asyncio.Semaphore(QUEUE_CHUNKS)
+    finished = loop.create_future()
+    stop = threading.Event()
+    limit = timeout_seconds()
+
+    def notify(callback, *args):
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # loop closed after a timeout; nobody is waiting any more
+
+    def take():
+        batch = pending.get()
+        notify(room.release)
+        return batch
+
+    def lines():
+        busy, since = 0.0, time.monotonic()
+        while True:
+            busy += time.monotonic() - since
+            if stop.is_set() or busy > limit:
+                raise AnalysisTimeout(f"Static analysis took longer than {limit:g}s")
+            batch = take()
+            since = time.monotonic()
+            if batch is None:
+                return
+            yield from batch
+
+    def settle(result, error):
+        if not finished.done():
+            if error is not None:
+                finished.set_exception(error)
+            else:
+                finished.set_result(result)
+
+    def check():
+        result, error = None, None
+        try:
+            result = analyzer.static_errors_from_lines(lines())
+        except Exception as e:
+            error = e
+        notify(settle, result, error)
+        # Keep draining after an early return so the reader never waits for room
+        while take() is not None:
+            pass
+
+    async def put(item):
+        await room.acquire()
+        pending.put_nowait(item)
+
+    threading.Thread(target=check, name="upload-check", daemon=True).start()
+    splitter = LineSplitter()
+    byte_count = len(head)
+    try:
+        await put(splitter.feed(bytes(head)))
+        del head[:]
+        async for chunk in chunks:
+            byte_count += len(chunk)
+            await put(splitter.feed(chunk))
+        await put(splitter.feed(b"", final=True))
+    finally:
+        await put(None)
+
+    try:
+        errors = await asyncio.wait_for(asyncio.shield(finished), limit)
+    except asyncio.TimeoutError:
+        stop.set()  # the checker gives up at its next line
+        raise AnalysisTimeout(f"Static analysis took longer than {limit:g}s")
+    return errors, splitter.lines, byte_count
@@ -20,10 +20,23 @@ const DEFAULT_CODE = {
   cpp: "// Write C++ code here\n",
 };
 
+// Delay before edits are sent for live diagnostics
+const SYNC_DELAY_MS = 400;
+
 function App() {
   const editorRef = useRef(null);
+  const monacoRef = useRef(null);
 
   const [language, setLanguage] = useState("python");
+  const languageRef = useRef(language);
+  languageRef.current = language;
+
+  // Server-side copy of the buffer for incremental analysis
+  const documentRef = useRef({ id: null, version: 0 });
+  const pendingEdits = useRef([]);
+  const syncTimer = useRef(null);
+  const syncChain = useRef(Promise.resolve());
+
   const [analysisResult, setAnalysisResult] = useState(null);
   const [loading, setLoading] = useState(false);
   const [fileName, setFileName] = useState("");
@@ -38,11 +51,117 @@ function App() {
 
   /* ---------------- Editor Mount ---------------- */
 
-  function handleEditorDidMount(editor) {
+  function handleEditorDidMount(editor, monaco) {
     editorRef.current = editor;
+    monacoRef.current = monaco;
     editor.setValue(DEFAULT_CODE[language]);
+    scheduleSync();
   }
 
+  /* ---------------- Live Diagnostics ---------------- */
+
+  const showDiagnostics = (result) => {
+    const model = editorRef.current?.getModel();
+    const monaco = monacoRef.current;
+    if (!model || !monaco) return;
+
+    const markers = [...(result.errors || []), ...(result.warnings || [])].map((d) => {
+      // Some analyzers only put the line number in the message
+      const fromMessage = Number((/^Line (\d+)/.exec(d.message) || [])[1]);
+      const line = Math.min(d.line > 0 ? d.line : fromMessage || 1, model.getLineCount());
+
+      return {
+        startLineNumber: line,
+        endLineNumber: line,
+        startColumn: d.column || 1,
+        endColumn: model.getLineMaxColumn(line),
+        message: `${d.message} (${d.code})`,
+        severity:
+          d.severity === "ERROR"
+            ? monaco.MarkerSeverity.Error
+            : monaco.MarkerSeverity.Warning,
+      };
+    });
+
+    monaco.editor.setModelMarkers(model, "ai-bug-finder", markers);
+  };
+
+  const openDocument = async () => {
+    // Reopening keeps the id, so the server replaces its copy instead of
+    // collecting a new document each time (e.g. when a worker lacks it)
+    const id = documentRef.current.id || `${languageRef.current}-${Date.now()}`;
+    documentRef.current = { id, version: 0 };
+    pendingEdits.current = [];
+
+    const response = await fetch(`/api/documents/${id}`, {
+      method: "PUT",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        language: languageRef.current,
+        text: editorRef.current?.getValue() || "",
+        version: 0,
+      }),
+    });
+
+    if (response.ok) showDiagnostics(await response.json());
+  };
+
+  const sendEdits = async () => {
+    if (!documentRef.current.id) return openDocument();
+
+    const edits = pendingEdits.current;
+    pendingEdits.current = [];
+    if (!edits.length) return;
+
+    const { id } = documentRef.current;
+    const version = documentRef.current.version + 1;
+    documentRef.current.version = version;
+
+    let response;
+    try {
+      response = await fetch(`/api/documents/${id}`, {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ version, edits }),
+      });
+    } catch (err) {
+      // The edits may be lost, so later versions would not apply: resend the whole buffer
+      return openDocument();
+    }
+
+    // Server lost or rejected our copy: resend the whole buffer
+    if (response.status === 404 || response.status === 409) return openDocument();
+    if (response.ok) showDiagnostics(await response.json());
+  };
+
+  const scheduleSync = () => {
+    clearTimeout(syncTimer.current);
+    syncTimer.current = setTimeout(() => {
+      // Requests run one at a time so versions arrive in order
+      syncChain.current = syncChain.current.then(sendEdits).catch(() => {});
+    }, SYNC_DELAY_MS);
+  };
+
+  const handleEditorChange = (value, event) => {
+    if (event.isFlush) {
+      // setValue() replaced the whole buffer (file load, tab switch)
+      documentRef.current = { id: null, version: 0 };
+      pendingEdits.current = [];
+    } else {
+      pendingEdits.current.push(
+        ...event.changes.map((change) => ({
+          start_line: change.range.startLineNumber,
+          start_column: change.range.startColumn,
+          end_line: change.range.endLineNumber,
+          end_column: change.range.endColumn,
+          text: change.text,
+        }))
+      );
+    }
+
+    scheduleSync();
+  };
+
   /* ---------------- File Load ---------------- */
 
   const loadFileToEditor = (file) => {
@@ -87,14 +206,50 @@ function App() {
     const code = editorRef.current?.getValue() || "";
 
     try {
-      const response = await fetch("/api/analyze", {
+      const response = await fetch("/api/analyze/stream", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ language, code }),
       });
 
-      const data = await response.json();
-      setAnalysisResult(data);
+      if (!response.ok) {
+        // 413 / 422 / 500 carry a JSON error body, not an event stream
+        const body = await response.json().catch(() => ({}));
+        const detail =
+          typeof body.detail === "string" ? body.detail : `Request failed (${response.status})`;
+        throw new Error(detail);
+      }
+
+      // NDJSON events: "static" -> "token"* -> "done"
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      const handleEvent = (event) => {
+        if (event.type === "token") {
+          setAnalysisResult((prev) => ({
+            ...prev,
+            solution: (prev?.solution || "") + event.text,
+          }));
+        } else {
+          setAnalysisResult(event.result);
+        }
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+
+        lines.filter((line) => line.trim()).forEach((line) => {
+          handleEvent(JSON.parse(line));
+        });
+      }
+
+      if (buffer.trim()) handleEvent(JSON.parse(buffer));
     } catch (err) {
       setAnalysisResult({
         errors: [
@@ -176,6 +331,7 @@ function App() {
         language={language}
         theme="vs-dark"
         onMount={handleEditorDidMount}
+        onChange={handleEditorChange}
       />
 
       {/* -------- Analyze -------- */}